@@ -1,14 +1,31 @@
 # This file is part of pycloudlib. See LICENSE file for license information.
 """Main pycloud module __init__."""
 
+import importlib
 import logging
+import sys
+import typing
 
-from pycloudlib.azure.cloud import Azure
-from pycloudlib.ec2.cloud import EC2
-from pycloudlib.gce.cloud import GCE
-from pycloudlib.lxd.cloud import LXD, LXDContainer, LXDVirtualMachine
-from pycloudlib.oci.cloud import OCI
-from pycloudlib.openstack.cloud import Openstack
+# Cloud classes are imported on first access so that only the SDKs of the
+# clouds actually used get loaded.
+_LAZY_IMPORTS = {
+    "Azure": "pycloudlib.azure.cloud",
+    "EC2": "pycloudlib.ec2.cloud",
+    "GCE": "pycloudlib.gce.cloud",
+    "LXD": "pycloudlib.lxd.cloud",
+    "LXDContainer": "pycloudlib.lxd.cloud",
+    "LXDVirtualMachine": "pycloudlib.lxd.cloud",
+    "OCI": "pycloudlib.oci.cloud",
+    "Openstack": "pycloudlib.openstack.cloud",
+}
+
+if typing.TYPE_CHECKING:
+    from pycloudlib.azure.cloud import Azure
+    from pycloudlib.ec2.cloud import EC2
+    from pycloudlib.gce.cloud import GCE
+    from pycloudlib.lxd.cloud import LXD, LXDContainer, LXDVirtualMachine
+    from pycloudlib.oci.cloud import OCI
+    from pycloudlib.openstack.cloud import Openstack
 
 __all__ = [
     "Azure",
@@ -21,4 +38,28 @@ __all__ = [
     "Openstack",
 ]
 
+
+def __getattr__(name):
+    """Import the requested cloud class on first access."""
+    try:
+        module_name = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        ) from None
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include the lazily imported cloud classes."""
+    return sorted(set(globals()) | set(__all__))
+
+
+# Module level __getattr__ (PEP 562) is only supported from Python 3.7
+if sys.version_info < (3, 7):
+    for _name in __all__:
+        __getattr__(_name)
+
 logging.getLogger(__name__).addHandler(logging.NullHandler())
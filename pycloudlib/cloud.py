@@ -3,12 +3,12 @@
 
 import enum
 import getpass
-import io
 import logging
 import os
 from abc import ABC, abstractmethod
 
-import paramiko
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 
 from pycloudlib.config import ConfigFile, parse_config
 from pycloudlib.instance import BaseInstance
@@ -51,17 +51,17 @@ class BaseCloud(ABC):
         self.check_and_set_config(config_file, required_values)
 
         user = getpass.getuser()
+        public_key_path = os.path.expandvars(
+            os.path.expanduser(
+                self.config.get("public_key_path", f"~{user}/.ssh/id_rsa.pub")
+            )
+        )
+        private_key_path = os.path.expandvars(
+            os.path.expanduser(self.config.get("private_key_path", ""))
+        )
         self.key_pair = KeyPair(
-            public_key_path=os.path.expandvars(
-                os.path.expanduser(
-                    self.config.get(
-                        "public_key_path", f"~{user}/.ssh/id_rsa.pub"
-                    )
-                )
-            ),
-            private_key_path=os.path.expandvars(
-                os.path.expanduser(self.config.get("private_key_path", ""))
-            ),
+            public_key_path=public_key_path,
+            private_key_path=private_key_path,
             name=self.config.get("key_name", user),
         )
         if timestamp_suffix:
@@ -174,19 +174,41 @@ class BaseCloud(ABC):
         """
         raise NotImplementedError
 
-    def create_key_pair(self):
+    def create_key_pair(self, *, algorithm="ed25519"):
         """Create and set a ssh key pair for a cloud instance.
 
+        Ed25519 keys are generated by default as they are much faster to
+        create than RSA keys. A 2048-bit RSA key is only generated when
+        explicitly requested.
+
+        Args:
+            algorithm: string, key algorithm to use: "ed25519" or "rsa"
+
         Returns:
             A tuple containing the public and private key created
         """
-        key = paramiko.RSAKey.generate(4096)
-        priv_str = io.StringIO()
+        if algorithm == "rsa":
+            key = rsa.generate_private_key(
+                public_exponent=65537, key_size=2048
+            )
+            private_format = serialization.PrivateFormat.TraditionalOpenSSL
+        elif algorithm == "ed25519":
+            key = ed25519.Ed25519PrivateKey.generate()
+            private_format = serialization.PrivateFormat.OpenSSH
+        else:
+            raise ValueError("Unsupported key algorithm: {}".format(algorithm))
 
-        pub_key = "{} {}".format(key.get_name(), key.get_base64())
-        key.write_private_key(priv_str, password=None)
+        pub_key = key.public_key().public_bytes(
+            encoding=serialization.Encoding.OpenSSH,
+            format=serialization.PublicFormat.OpenSSH,
+        )
+        priv_key = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=private_format,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
 
-        return pub_key, priv_str.getvalue()
+        return pub_key.decode("utf-8"), priv_key.decode("utf-8")
 
     def use_key(self, public_key_path, private_key_path=None, name=None):
         """Use an existing key.
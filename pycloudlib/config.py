@@ -1,4 +1,6 @@
 """Deal with configuration file."""
+import copy
+import hashlib
 import logging
 import os
 from io import StringIO
@@ -16,6 +18,10 @@ CONFIG_PATHS = [
 ConfigFile = Union[Path, StringIO]
 log = logging.getLogger(__name__)
 
+# Parsed configs keyed on (path, mtime) for files and on a hash of the
+# content for streams
+_CONFIG_CACHE = {}
+
 
 class Config(dict):
     """Override dict to allow raising a more meaningful KeyError."""
@@ -31,6 +37,33 @@ class Config(dict):
             ) from None
 
 
+def clear_config_cache():
+    """Drop all cached parsed configuration files."""
+    _CONFIG_CACHE.clear()
+
+
+def _load_config(config_file):
+    """Load a TOML config, reusing the parsed result if it is unchanged."""
+    if hasattr(config_file, "read"):
+        data = config_file.read()
+        cache_key = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        source = StringIO(data)
+    else:
+        try:
+            cache_key = (str(config_file), os.stat(config_file).st_mtime_ns)
+        except OSError:
+            cache_key = None
+        source = config_file
+
+    if cache_key in _CONFIG_CACHE:
+        return copy.deepcopy(_CONFIG_CACHE[cache_key])
+
+    config = toml.load(source, _dict=Config)
+    if cache_key is not None:
+        _CONFIG_CACHE[cache_key] = copy.deepcopy(config)
+    return config
+
+
 def parse_config(config_file: ConfigFile = None) -> MutableMapping[str, Any]:
     """Find the relevant TOML, load, and return it."""
     possible_configs = []
@@ -41,7 +74,7 @@ def parse_config(config_file: ConfigFile = None) -> MutableMapping[str, Any]:
     possible_configs.extend(CONFIG_PATHS)
     for path in possible_configs:
         try:
-            config = toml.load(path, _dict=Config)
+            config = _load_config(path)
             log.debug("Loaded configuration from %s", path)
             return config
         except FileNotFoundError:
@@ -1,16 +1,64 @@
 # This file is part of pycloudlib. See LICENSE file for license information.
 """AWS EC2 Cloud type."""
+import datetime
+import fnmatch
+import functools
+import itertools
+import operator
 import re
+import time
 
 import botocore
 
 from pycloudlib.cloud import BaseCloud, ImageType
 from pycloudlib.config import ConfigFile
 from pycloudlib.ec2.instance import EC2Instance
-from pycloudlib.ec2.util import _get_session, _tag_resource
+from pycloudlib.ec2.util import (
+    DEFAULT_MAX_POOL_CONNECTIONS,
+    _get_ec2_client,
+    _get_ec2_resource,
+    _get_session,
+    _tag_resource,
+)
 from pycloudlib.ec2.vpc import VPC
 from pycloudlib.util import LTS_RELEASES, UBUNTU_RELEASE_VERSION_MAP
 
+# Daily images are built frequently, so only search recent ones first
+DAILY_SEARCH_DAYS = 14
+
+# Seconds to wait for a snapshot image to become available
+SNAPSHOT_TIMEOUT = 900
+
+_GENERIC_NAME = "ubuntu/images/hvm-ssd/ubuntu-{release}"
+_GENERIC_DAILY_NAME = "ubuntu/images-testing/hvm-ssd/ubuntu-{release}-daily"
+_PRO_NAME = "ubuntu-pro-server/images/hvm-ssd/ubuntu-{release}-{version}-*"
+_PRO_FIPS_NAME = "ubuntu-pro-fips*/images/hvm-ssd/ubuntu-{release}-{version}-*"
+
+# Image name patterns keyed on (image type, is LTS release, is daily image)
+_NAME_TEMPLATES = {
+    (ImageType.GENERIC, True, False): _GENERIC_NAME + "-*-server-*",
+    (ImageType.GENERIC, True, True): _GENERIC_DAILY_NAME + "-*-server-*",
+    (ImageType.GENERIC, False, False): _GENERIC_NAME + "-*",
+    (ImageType.GENERIC, False, True): _GENERIC_DAILY_NAME + "-*",
+}
+for _is_lts, _daily in itertools.product((True, False), repeat=2):
+    _NAME_TEMPLATES[(ImageType.PRO, _is_lts, _daily)] = _PRO_NAME
+    _NAME_TEMPLATES[(ImageType.PRO_FIPS, _is_lts, _daily)] = _PRO_FIPS_NAME
+
+_SERIAL_RE = re.compile(r"ubuntu/.*/.*/.*-(?P<serial>\d+(?:\.\d+)?)$")
+
+# Results of describe_images calls shared by all EC2 objects, keyed on
+# (region, owner, filters) and holding (expiry time, images)
+_IMAGE_CACHE = {}
+
+
+def _freeze_filters(filters):
+    """Convert a list of EC2 filter dicts into a hashable tuple."""
+    return tuple(
+        (image_filter["Name"], tuple(image_filter["Values"]))
+        for image_filter in filters
+    )
+
 
 class EC2(BaseCloud):
     """EC2 Cloud Class."""
@@ -32,6 +80,16 @@ class EC2(BaseCloud):
         boto3 will read a users /home/$USER/.aws/* files if no
         arguments are provided here to find values.
 
+        Image lookups are cached for `cache_ttl` seconds (default: 3600),
+        which can be set in the config file. Set it to 0 to disable caching.
+
+        Requests use adaptive retries and a connection pool of
+        `max_pool_connections` (default: 50), which can also be set in the
+        config file.
+
+        Snapshots are polled for availability every `snapshot_poll_delay`
+        seconds (default: 5), kept between 1 and SNAPSHOT_TIMEOUT.
+
         Args:
             tag: string used to name and tag resources with
             timestamp_suffix: bool set True to append a timestamp suffix to the
@@ -55,8 +113,11 @@ class EC2(BaseCloud):
                 secret_access_key or self.config.get("secret_access_key"),
                 region or self.config.get("region"),
             )
-            self.client = session.client("ec2")
-            self.resource = session.resource("ec2")
+            max_pool_connections = self.config.get(
+                "max_pool_connections", DEFAULT_MAX_POOL_CONNECTIONS
+            )
+            self.client = _get_ec2_client(session, max_pool_connections)
+            self.resource = _get_ec2_resource(session, max_pool_connections)
             self.region = session.region_name
         except botocore.exceptions.NoRegionError as e:
             raise RuntimeError(
@@ -66,6 +127,53 @@ class EC2(BaseCloud):
             raise RuntimeError(
                 "Please configure ec2 credentials in $HOME/.aws/credentials"
             ) from e
+        self.cache_ttl = self.config.get("cache_ttl", 3600)
+        # Keep at least a second between polls and one poll in the timeout
+        self.snapshot_poll_delay = min(
+            max(1, int(self.config.get("snapshot_poll_delay", 5))),
+            SNAPSHOT_TIMEOUT,
+        )
+
+    def clear_image_cache(self):
+        """Drop all cached image lookups."""
+        _IMAGE_CACHE.clear()
+
+    def _describe_images(self, owner, filters):
+        """Return the images matching filters, caching the result.
+
+        Args:
+            owner: string, owner of the images
+            filters: list of EC2 filter dicts
+
+        Returns:
+            list of image dictionaries
+        """
+        if self.cache_ttl <= 0:
+            return self.client.describe_images(
+                Owners=[owner],
+                Filters=filters,
+            ).get("Images", [])
+
+        key = (self.region, owner, _freeze_filters(filters))
+        now = time.monotonic()
+        cached = _IMAGE_CACHE.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        images = self.client.describe_images(
+            Owners=[owner],
+            Filters=filters,
+        ).get("Images", [])
+        if images:
+            # Daily searches are keyed on the date, so expire old entries
+            for expired_key in [
+                cache_key
+                for cache_key, (expiry, _) in list(_IMAGE_CACHE.items())
+                if expiry <= now
+            ]:
+                _IMAGE_CACHE.pop(expired_key, None)
+            _IMAGE_CACHE[key] = (now + self.cache_ttl, images)
+        return images
 
     def get_or_create_vpc(self, name, ipv4_cidr="192.168.1.0/20"):
         """Create a or return matching VPC.
@@ -109,33 +217,46 @@ class EC2(BaseCloud):
         )
         return image["ImageId"]
 
-    def _get_name_for_image_type(
-        self, release: str, image_type: ImageType, daily: bool
+    def released_images(
+        self,
+        releases,
+        arch="x86_64",
+        image_type: ImageType = ImageType.GENERIC,
     ):
-        if image_type == ImageType.GENERIC:
-            base_location = "ubuntu/{}/hvm-ssd".format(
-                "images-testing" if daily else "images"
-            )
-            if release in LTS_RELEASES:
-                return "{}/ubuntu-{}{}-*-server-*".format(
-                    base_location, release, "-daily" if daily else ""
-                )
+        """Find the ids of the latest released images for several releases.
 
-            return "{}/ubuntu-{}{}-*".format(
-                base_location, release, "-daily" if daily else ""
-            )
+        All releases are looked up with a single API call.
 
-        if image_type == ImageType.PRO:
-            return "ubuntu-pro-server/images/hvm-ssd/ubuntu-{}-{}-*".format(
-                release, UBUNTU_RELEASE_VERSION_MAP[release]
-            )
+        Args:
+            releases: list of strings, Ubuntu releases to look for
+            arch: string, architecture to use
+            image_type: ImageType, type of image to look for
 
-        if image_type == ImageType.PRO_FIPS:
-            return "ubuntu-pro-fips*/images/hvm-ssd/ubuntu-{}-{}-*".format(
-                release, UBUNTU_RELEASE_VERSION_MAP[release]
-            )
+        Returns:
+            dictionary mapping each release to the id of its latest image
+
+        """
+        self._log.debug("finding released Ubuntu images for %s", releases)
+        images = self._find_latest_images(
+            releases=releases, arch=arch, image_type=image_type, daily=False
+        )
+        return {release: image["ImageId"] for release, image in images.items()}
 
-        raise ValueError("Invalid image_type")
+    @staticmethod
+    def _get_name_for_image_type(
+        release: str, image_type: ImageType, daily: bool
+    ):
+        try:
+            template = _NAME_TEMPLATES[
+                (image_type, release in LTS_RELEASES, bool(daily))
+            ]
+        except KeyError:
+            raise ValueError("Invalid image_type") from None
+        if image_type == ImageType.GENERIC:
+            return template.format(release=release)
+        return template.format(
+            release=release, version=UBUNTU_RELEASE_VERSION_MAP[release]
+        )
 
     def _get_owner(self, image_type: ImageType):
         return (
@@ -145,42 +266,126 @@ class EC2(BaseCloud):
         )
 
     def _get_search_filters(
-        self, release: str, arch: str, image_type: ImageType, daily: bool
+        self,
+        releases,
+        arch: str,
+        image_type: ImageType,
+        daily: bool,
+        recent_days=None,
     ):
-        return [
+        # Image CreationDate is in UTC, so the window must use the UTC date
+        today = (
+            datetime.datetime.now(datetime.timezone.utc).date()
+            if recent_days
+            else None
+        )
+        return self._build_search_filters(
+            tuple(releases), arch, image_type, daily, recent_days, today
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _build_search_filters(
+        releases, arch, image_type, daily, recent_days, today
+    ):
+        """Build the describe_images filters, memoized per set of inputs.
+
+        The returned filters are shared between calls and must not be
+        modified.
+        """
+        filters = (
             {
                 "Name": "name",
-                "Values": [
-                    self._get_name_for_image_type(release, image_type, daily)
-                ],
+                "Values": tuple(
+                    EC2._get_name_for_image_type(release, image_type, daily)
+                    for release in releases
+                ),
             },
             {
                 "Name": "architecture",
-                "Values": [arch],
+                "Values": (arch,),
             },
-        ]
+        )
+        if recent_days:
+            filters += (
+                {
+                    "Name": "creation-date",
+                    "Values": tuple(
+                        f"{today - datetime.timedelta(days=i)}*"
+                        for i in range(recent_days)
+                    ),
+                },
+            )
+        return filters
+
+    @staticmethod
+    def _select_latest_images(releases, name_patterns, images):
+        """Map each release to its newest image, or None if there is none."""
+        return {
+            release: max(
+                (
+                    image
+                    for image in images
+                    if fnmatch.fnmatchcase(image.get("Name", ""), name_pattern)
+                ),
+                key=operator.itemgetter("CreationDate"),
+                default=None,
+            )
+            for release, name_pattern in zip(releases, name_patterns)
+        }
 
-    def _find_latest_image(
-        self, release: str, arch: str, image_type: ImageType, daily: bool
+    def _find_latest_images(
+        self, releases, arch: str, image_type: ImageType, daily: bool
     ):
+        """Find the latest image of each release with one describe call.
+
+        Daily images are first searched for among the images created in
+        the last DAILY_SEARCH_DAYS days, falling back to all images for
+        releases without recent builds.
+
+        Returns:
+            dictionary mapping each release to its latest image dictionary
+        """
+        owner = self._get_owner(image_type=image_type)
         filters = self._get_search_filters(
-            release=release, arch=arch, image_type=image_type, daily=daily
+            releases=releases,
+            arch=arch,
+            image_type=image_type,
+            daily=daily,
+            recent_days=DAILY_SEARCH_DAYS if daily else None,
         )
-        owner = self._get_owner(image_type=image_type)
-
-        images = self.client.describe_images(
-            Owners=[owner],
-            Filters=filters,
+        images = self._describe_images(owner, filters)
+        latest_images = self._select_latest_images(
+            releases, filters[0]["Values"], images
         )
 
-        if not images.get("Images"):
-            raise Exception(
-                "Could not find {} image for {} release".format(
-                    image_type.value, release
-                )
+        if daily and None in latest_images.values():
+            filters = self._get_search_filters(
+                releases=releases,
+                arch=arch,
+                image_type=image_type,
+                daily=daily,
             )
+            images = self._describe_images(owner, filters)
+            latest_images = self._select_latest_images(
+                releases, filters[0]["Values"], images
+            )
+
+        for release, image in latest_images.items():
+            if image is None:
+                raise Exception(
+                    f"Could not find {image_type.value} image for"
+                    f" {release} release"
+                )
 
-        return sorted(images["Images"], key=lambda x: x["CreationDate"])[-1]
+        return latest_images
+
+    def _find_latest_image(
+        self, release: str, arch: str, image_type: ImageType, daily: bool
+    ):
+        return self._find_latest_images(
+            releases=[release], arch=arch, image_type=image_type, daily=daily
+        )[release]
 
     def daily_image(
         self, release, arch="x86_64", image_type: ImageType = ImageType.GENERIC
@@ -201,35 +406,72 @@ class EC2(BaseCloud):
         )
         return image["ImageId"]
 
-    def _find_image_serial(
-        self, image_id, image_type: ImageType = ImageType.GENERIC
+    def daily_images(
+        self,
+        releases,
+        arch="x86_64",
+        image_type: ImageType = ImageType.GENERIC,
+    ):
+        """Find the ids of the latest daily images for several releases.
+
+        All releases are looked up with a single API call.
+
+        Args:
+            releases: list of strings, Ubuntu releases to look for
+            arch: string, architecture to use
+            image_type: ImageType, type of image to look for
+
+        Returns:
+            dictionary mapping each release to the id of its latest image
+
+        """
+        self._log.debug("finding daily Ubuntu images for %s", releases)
+        images = self._find_latest_images(
+            releases=releases, arch=arch, image_type=image_type, daily=True
+        )
+        return {release: image["ImageId"] for release, image in images.items()}
+
+    def _find_image_serials(
+        self, image_ids, image_type: ImageType = ImageType.GENERIC
     ):
+        """Find the serials of several images with one describe call.
+
+        Returns:
+            dictionary mapping each image id to its serial
+        """
         owner = self._get_owner(image_type=image_type)
         filters = [
             {
                 "Name": "image-id",
-                "Values": (image_id,),
+                "Values": tuple(image_ids),
             }
         ]
 
-        images = self.client.describe_images(
-            Owners=[owner],
-            Filters=filters,
-        )
+        images = self._describe_images(owner, filters)
+        image_names = {
+            image["ImageId"]: image.get("Name", "") for image in images
+        }
 
-        if not images.get("Images"):
-            raise Exception("Could not find image: {}".format(image_id))
+        serials = {}
+        for image_id in image_ids:
+            if image_id not in image_names:
+                raise Exception(f"Could not find image: {image_id}")
 
-        image_name = images["Images"][0].get("Name", "")
-        serial_regex = r"ubuntu/.*/.*/.*-(?P<serial>\d+(\.\d+)?)$"
-        serial_match = re.match(serial_regex, image_name)
+            serial_match = _SERIAL_RE.match(image_names[image_id])
 
-        if not serial_match:
-            raise Exception(
-                "Could not find image serial for image: {}".format(image_id)
-            )
+            if not serial_match:
+                raise Exception(
+                    f"Could not find image serial for image: {image_id}"
+                )
+
+            serials[image_id] = serial_match.group("serial")
 
-        return serial_match.groupdict().get("serial")
+        return serials
+
+    def _find_image_serial(
+        self, image_id, image_type: ImageType = ImageType.GENERIC
+    ):
+        return self._find_image_serials([image_id], image_type)[image_id]
 
     def image_serial(
         self, image_id, image_type: ImageType = ImageType.GENERIC
@@ -254,8 +496,8 @@ class EC2(BaseCloud):
         Args:
             image_id: string, id of the image to delete
         """
-        image = self.resource.Image(image_id)
-        snapshot_id = image.block_device_mappings[0]["Ebs"]["SnapshotId"]
+        image = self.client.describe_images(ImageIds=[image_id])["Images"][0]
+        snapshot_id = image["BlockDeviceMappings"][0]["Ebs"]["SnapshotId"]
 
         self._log.debug("removing custom ami %s", image_id)
         self.client.deregister_image(ImageId=image_id)
@@ -285,27 +527,31 @@ class EC2(BaseCloud):
         instance = self.resource.Instance(instance_id)
         return EC2Instance(self.key_pair, self.client, instance)
 
-    def launch(
+    def _build_run_args(
         self,
         image_id,
-        instance_type="t3.micro",  # Using nitro instance for IPv6
+        instance_type,
         user_data=None,
-        wait=True,
         vpc=None,
-        **kwargs,
+        count=1,
+        extra_tags=None,
+        extra_args=None,
     ):
-        """Launch instance on EC2.
+        """Build the arguments to create_instances.
 
         Args:
-            image_id: string, AMI ID to use default: latest Ubuntu LTS
+            image_id: string, AMI ID to use
             instance_type: string, instance type to launch
-            user_data: string, user-data to pass to instance
-            wait: boolean, wait for instance to come up
-            vpc: optional vpc object to create instance under
-            kwargs: other named arguments to add to instance JSON
+            user_data: string, user-data to pass to instances
+            vpc: optional vpc object to create instances under
+            count: int, number of instances to launch
+            extra_tags: optional list of {"Key": ..., "Value": ...} tags to
+                add besides the Name tag
+            extra_args: optional dictionary of other named arguments to add
+                to instance JSON
 
         Returns:
-            EC2 Instance object
+            dictionary of create_instances arguments
         Raises: ValueError on invalid image_id
         """
         if not image_id:
@@ -317,12 +563,15 @@ class EC2(BaseCloud):
             "ImageId": image_id,
             "InstanceType": instance_type,
             "KeyName": self.key_pair.name,
-            "MaxCount": 1,
-            "MinCount": 1,
+            "MaxCount": count,
+            "MinCount": count,
             "TagSpecifications": [
                 {
                     "ResourceType": "instance",
-                    "Tags": [{"Key": "Name", "Value": self.tag}],
+                    "Tags": [
+                        {"Key": "Name", "Value": self.tag},
+                        *(extra_tags or []),
+                    ],
                 }
             ],
         }
@@ -330,21 +579,52 @@ class EC2(BaseCloud):
         if user_data:
             args["UserData"] = user_data
 
-        for key, value in kwargs.items():
+        for key, value in (extra_args or {}).items():
             args[key] = value
 
         if vpc:
             try:
-                [subnet_id] = [s.id for s in vpc.vpc.subnets.all()]
+                [subnet_id] = vpc.subnet_ids
             except ValueError as e:
                 raise RuntimeError(
-                    "Too many subnets in vpc {}. pycloudlib does not support"
-                    " launching into VPCs with multiple subnets".format(vpc.id)
+                    f"Too many subnets in vpc {vpc.id}. pycloudlib does not"
+                    " support launching into VPCs with multiple subnets"
                 ) from e
             args["SubnetId"] = subnet_id
-            args["SecurityGroupIds"] = [
-                sg.id for sg in vpc.vpc.security_groups.all()
-            ]
+            args["SecurityGroupIds"] = vpc.security_group_ids
+
+        return args
+
+    def launch(
+        self,
+        image_id,
+        instance_type="t3.micro",  # Using nitro instance for IPv6
+        user_data=None,
+        wait=True,
+        vpc=None,
+        **kwargs,
+    ):
+        """Launch instance on EC2.
+
+        Args:
+            image_id: string, AMI ID to use default: latest Ubuntu LTS
+            instance_type: string, instance type to launch
+            user_data: string, user-data to pass to instance
+            wait: boolean, wait for instance to come up
+            vpc: optional vpc object to create instance under
+            kwargs: other named arguments to add to instance JSON
+
+        Returns:
+            EC2 Instance object
+        Raises: ValueError on invalid image_id
+        """
+        args = self._build_run_args(
+            image_id=image_id,
+            instance_type=instance_type,
+            user_data=user_data,
+            vpc=vpc,
+            extra_args=kwargs,
+        )
 
         self._log.debug("launching instance")
         instances = self.resource.create_instances(**args)
@@ -355,6 +635,64 @@ class EC2(BaseCloud):
 
         return instance
 
+    def launch_many(
+        self,
+        image_id,
+        count,
+        instance_type="t3.micro",  # Using nitro instance for IPv6
+        user_data=None,
+        wait=True,
+        vpc=None,
+        extra_tags=None,
+        **kwargs,
+    ):
+        """Launch several identical instances on EC2 with a single call.
+
+        All instances are tagged by the launch request itself, so none are
+        left untagged if tagging afterwards would fail. When waiting, a
+        single waiter polls for all instances to be running before each
+        instance is waited on for cloud-init.
+
+        Args:
+            image_id: string, AMI ID to use
+            count: int, number of instances to launch
+            instance_type: string, instance type to launch
+            user_data: string, user-data to pass to instances
+            wait: boolean, wait for instances to come up
+            vpc: optional vpc object to create instances under
+            extra_tags: optional list of {"Key": ..., "Value": ...} tags to
+                add to the instances besides the Name tag
+            kwargs: other named arguments to add to instance JSON
+
+        Returns:
+            list of EC2 Instance objects
+        Raises: ValueError on invalid image_id
+        """
+        args = self._build_run_args(
+            image_id=image_id,
+            instance_type=instance_type,
+            user_data=user_data,
+            vpc=vpc,
+            count=count,
+            extra_tags=extra_tags,
+            extra_args=kwargs,
+        )
+
+        self._log.debug("launching %d instances", count)
+        instances = self.resource.create_instances(**args)
+        ec2_instances = [
+            EC2Instance(self.key_pair, self.client, instance)
+            for instance in instances
+        ]
+
+        if wait:
+            waiter = self.client.get_waiter("instance_running")
+            waiter.wait(InstanceIds=[instance.id for instance in instances])
+            for instance in ec2_instances:
+                instance.wait()
+
+        return ec2_instances
+
     def list_keys(self):
         """List all ssh key pair names loaded on this EC2 region."""
         keypair_names = []
@@ -381,7 +719,7 @@ class EC2(BaseCloud):
         self._log.debug("creating custom ami from instance %s", instance.id)
 
         response = self.client.create_image(
-            Name="%s-%s" % (self.tag, instance.image_id),
+            Name=f"{self.tag}-{instance.image_id}",
             InstanceId=instance.id,
         )
         image_ami_edited = response["ImageId"]
@@ -433,11 +771,11 @@ class EC2(BaseCloud):
 
         """
         filters = [
-            "arch=%s" % arch,
-            "endpoint=%s" % "https://ec2.%s.amazonaws.com" % self.region,
-            "region=%s" % self.region,
-            "release=%s" % release,
-            "root_store=%s" % root_store,
+            f"arch={arch}",
+            f"endpoint=https://ec2.{self.region}.amazonaws.com",
+            f"region={self.region}",
+            f"release={release}",
+            f"root_store={root_store}",
             "virt=hvm",
         ]
 
@@ -451,5 +789,11 @@ class EC2(BaseCloud):
         """
         image.wait_until_exists()
         waiter = self.client.get_waiter("image_available")
-        waiter.wait(ImageIds=[image.id])
+        waiter.wait(
+            ImageIds=[image.id],
+            WaiterConfig={
+                "Delay": self.snapshot_poll_delay,
+                "MaxAttempts": SNAPSHOT_TIMEOUT // self.snapshot_poll_delay,
+            },
+        )
         image.reload()
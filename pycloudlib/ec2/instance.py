@@ -31,11 +31,9 @@ class EC2Instance(BaseInstance):
 
     def __repr__(self):
         """Create string representation for class."""
-        return "{}(key_pair={}, client={}, instance={})".format(
-            self.__class__.__name__,
-            self.key_pair,
-            self._client,
-            self._instance,
+        return (
+            f"{self.__class__.__name__}(key_pair={self.key_pair},"
+            f" client={self._client}, instance={self._instance})"
         )
 
     @property
@@ -115,7 +113,7 @@ class EC2Instance(BaseInstance):
             except KeyError:
                 self._log.debug("Console output not yet available; sleeping")
                 time.sleep(5)
-        return "No Console Output [%s]" % self._instance
+        return f"No Console Output [{self._instance}]"
 
     def delete(self, wait=True):
         """Delete instance."""
@@ -242,9 +240,8 @@ class EC2Instance(BaseInstance):
                 )
                 return nic.private_ip_address
         raise Exception(
-            "Could not attach NIC with AttachmentId: {}".format(
-                response.get("AttachmentId", None)
-            )
+            "Could not attach NIC with AttachmentId:"
+            f" {response.get('AttachmentId', None)}"
         )
 
     def _create_ebs_volume(self, size, drive_type):
@@ -339,7 +336,7 @@ class EC2Instance(BaseInstance):
         all_device_names = []
         for name in string.ascii_lowercase:
             if name not in "abcde":
-                all_device_names.append("/dev/sd%s" % name)
+                all_device_names.append(f"/dev/sd{name}")
 
         used_device_names = set()
         for device in self._instance.block_device_mappings:
@@ -0,0 +1 @@
+"""Tests related to pycloudlib.ec2 module."""
@@ -0,0 +1,529 @@
+"""Tests related to pycloudlib.ec2.cloud module."""
+import datetime
+from io import StringIO
+from unittest import mock
+
+import pytest
+
+from pycloudlib.cloud import ImageType
+from pycloudlib.ec2.cloud import (
+    _IMAGE_CACHE,
+    _NAME_TEMPLATES,
+    EC2,
+    SNAPSHOT_TIMEOUT,
+)
+from pycloudlib.util import LTS_RELEASES, UBUNTU_RELEASE_VERSION_MAP
+
+# mock module path
+MPATH = "pycloudlib.ec2.cloud."
+
+
+class FakeEC2(EC2):
+    """EC2 Class that doesn't load config or make requests during __init__."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, *_, **__):
+        """Fake __init__ that sets mocks for needed variables."""
+        self._log = mock.MagicMock()
+        self.client = mock.MagicMock()
+        self.resource = mock.MagicMock()
+        self.region = "us-east-1"
+        self.cache_ttl = 3600
+        self.snapshot_poll_delay = 5
+
+
+def _image(image_id, name, creation_date):
+    """Return a describe_images entry."""
+    return {"ImageId": image_id, "Name": name, "CreationDate": creation_date}
+
+
+def _released(release, serial):
+    """Return the name of a released generic LTS image."""
+    return (
+        f"ubuntu/images/hvm-ssd/ubuntu-{release}-"
+        f"{UBUNTU_RELEASE_VERSION_MAP[release]}-amd64-server-{serial}"
+    )
+
+
+def _daily(release, serial):
+    """Return the name of a daily generic LTS image."""
+    return (
+        f"ubuntu/images-testing/hvm-ssd/ubuntu-{release}-daily-amd64-server-"
+        f"{serial}"
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_image_cache():
+    """Drop image lookups cached by other tests."""
+    _IMAGE_CACHE.clear()
+    yield
+    _IMAGE_CACHE.clear()
+
+
+# pylint: disable=protected-access,redefined-outer-name
+class TestNameTemplates:
+    """Tests covering the image name patterns in _NAME_TEMPLATES."""
+
+    @staticmethod
+    def _if_chain_name(release, image_type, daily):
+        """Return the name pattern as built before _NAME_TEMPLATES."""
+        if image_type == ImageType.GENERIC:
+            base_location = "ubuntu/{}/hvm-ssd".format(
+                "images-testing" if daily else "images"
+            )
+            if release in LTS_RELEASES:
+                return "{}/ubuntu-{}{}-*-server-*".format(
+                    base_location, release, "-daily" if daily else ""
+                )
+
+            return "{}/ubuntu-{}{}-*".format(
+                base_location, release, "-daily" if daily else ""
+            )
+
+        if image_type == ImageType.PRO:
+            return "ubuntu-pro-server/images/hvm-ssd/ubuntu-{}-{}-*".format(
+                release, UBUNTU_RELEASE_VERSION_MAP[release]
+            )
+
+        if image_type == ImageType.PRO_FIPS:
+            return "ubuntu-pro-fips*/images/hvm-ssd/ubuntu-{}-{}-*".format(
+                release, UBUNTU_RELEASE_VERSION_MAP[release]
+            )
+
+        raise ValueError("Invalid image_type")
+
+    @pytest.mark.parametrize("daily", (False, True))
+    @pytest.mark.parametrize("image_type", list(ImageType))
+    @pytest.mark.parametrize(
+        "release", sorted(UBUNTU_RELEASE_VERSION_MAP) + ["lunar"]
+    )
+    def test_names_match_previous_if_chain(self, release, image_type, daily):
+        """Every table entry builds the pattern of the old if-chain."""
+        try:
+            expected = self._if_chain_name(release, image_type, daily)
+        except KeyError:
+            with pytest.raises(KeyError):
+                EC2._get_name_for_image_type(release, image_type, daily)
+        else:
+            assert expected == EC2._get_name_for_image_type(
+                release, image_type, daily
+            )
+
+    def test_table_covers_every_image_type(self):
+        """Each image type has a pattern for LTS/non-LTS, daily/released."""
+        assert {
+            (image_type, is_lts, daily)
+            for image_type in ImageType
+            for is_lts in (True, False)
+            for daily in (True, False)
+        } == set(_NAME_TEMPLATES)
+
+    def test_invalid_image_type(self):
+        """Unknown image types raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid image_type"):
+            EC2._get_name_for_image_type("jammy", "generic", False)
+
+
+class TestFindLatestImages:
+    """Tests covering EC2.released_images and EC2.daily_images."""
+
+    def test_several_releases_in_one_call(self):
+        """The newest image of each release comes from one request."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = {
+            "Images": [
+                _image("ami-j1", _released("jammy", "20220401"), "2022-04-01"),
+                _image("ami-j2", _released("jammy", "20220501"), "2022-05-01"),
+                _image("ami-f1", _released("focal", "20220301"), "2022-03-01"),
+            ]
+        }
+
+        assert {"jammy": "ami-j2", "focal": "ami-f1"} == ec2.released_images(
+            ["jammy", "focal"]
+        )
+        ec2.client.describe_images.assert_called_once_with(
+            Owners=["099720109477"],
+            Filters=(
+                {
+                    "Name": "name",
+                    "Values": (
+                        "ubuntu/images/hvm-ssd/ubuntu-jammy-*-server-*",
+                        "ubuntu/images/hvm-ssd/ubuntu-focal-*-server-*",
+                    ),
+                },
+                {"Name": "architecture", "Values": ("x86_64",)},
+            ),
+        )
+
+    def test_missing_release_raises(self):
+        """A release without any image is reported by name."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = {
+            "Images": [
+                _image("ami-j1", _released("jammy", "20220501"), "2022-05-01")
+            ]
+        }
+
+        with pytest.raises(
+            Exception, match="Could not find generic image for focal release"
+        ):
+            ec2.released_images(["jammy", "focal"])
+
+    def test_daily_falls_back_without_date_window(self):
+        """Releases without recent dailies are searched for again."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.side_effect = [
+            {
+                "Images": [
+                    _image("ami-j1", _daily("jammy", "20220509"), "2022-05-09")
+                ]
+            },
+            {
+                "Images": [
+                    _image(
+                        "ami-j1", _daily("jammy", "20220509"), "2022-05-09"
+                    ),
+                    _image(
+                        "ami-b1", _daily("bionic", "20210101"), "2021-01-01"
+                    ),
+                ]
+            },
+        ]
+
+        assert {"jammy": "ami-j1", "bionic": "ami-b1"} == ec2.daily_images(
+            ["jammy", "bionic"]
+        )
+        first, second = ec2.client.describe_images.call_args_list
+        assert "creation-date" == first[1]["Filters"][2]["Name"]
+        assert ["name", "architecture"] == [
+            image_filter["Name"] for image_filter in second[1]["Filters"]
+        ]
+
+    def test_daily_falls_back_when_date_window_is_empty(self):
+        """An empty date window is not cached and the fallback is used."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.side_effect = [
+            {"Images": []},
+            {
+                "Images": [
+                    _image("ami-j1", _daily("jammy", "20220101"), "2022-01-01")
+                ]
+            },
+        ]
+
+        assert "ami-j1" == ec2.daily_image("jammy")
+        assert 2 == ec2.client.describe_images.call_count
+        assert 1 == len(_IMAGE_CACHE)
+
+
+class TestImageCache:
+    """Tests covering the describe_images cache."""
+
+    IMAGES = {
+        "Images": [
+            _image("ami-j1", _released("jammy", "20220501"), "2022-05-01")
+        ]
+    }
+
+    @mock.patch(MPATH + "time")
+    def test_lookups_expire_after_ttl(self, m_time):
+        """Cached images are reused until cache_ttl seconds have passed."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = self.IMAGES
+
+        for now in (0, 3599):
+            m_time.monotonic.return_value = now
+            assert "ami-j1" == ec2.released_image("jammy")
+        assert 1 == ec2.client.describe_images.call_count
+
+        m_time.monotonic.return_value = 3600
+        assert "ami-j1" == ec2.released_image("jammy")
+        assert 2 == ec2.client.describe_images.call_count
+
+    def test_lookups_are_shared_between_objects(self):
+        """EC2 objects of the same region share cached images."""
+        first, second = FakeEC2(), FakeEC2()
+        first.client.describe_images.return_value = self.IMAGES
+
+        first.released_image("jammy")
+        assert "ami-j1" == second.released_image("jammy")
+        assert not second.client.describe_images.called
+
+        second.region = "eu-west-1"
+        second.client.describe_images.return_value = self.IMAGES
+        second.released_image("jammy")
+        assert 1 == second.client.describe_images.call_count
+
+    def test_clear_image_cache(self):
+        """clear_image_cache forces the next lookup to call EC2."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = self.IMAGES
+
+        ec2.released_image("jammy")
+        ec2.clear_image_cache()
+        ec2.released_image("jammy")
+        assert 2 == ec2.client.describe_images.call_count
+
+    def test_zero_ttl_disables_cache(self):
+        """A cache_ttl of 0 calls EC2 for every lookup."""
+        ec2 = FakeEC2()
+        ec2.cache_ttl = 0
+        ec2.client.describe_images.return_value = self.IMAGES
+
+        ec2.released_image("jammy")
+        ec2.released_image("jammy")
+        assert 2 == ec2.client.describe_images.call_count
+        assert not _IMAGE_CACHE
+
+    def test_zero_ttl_ignores_images_cached_by_others(self):
+        """A cache_ttl of 0 does not read images cached by other objects."""
+        caching, uncached = FakeEC2(), FakeEC2()
+        caching.client.describe_images.return_value = {
+            "Images": [
+                _image("ami-old", _released("jammy", "20220401"), "2022-04-01")
+            ]
+        }
+        caching.released_image("jammy")
+
+        uncached.cache_ttl = 0
+        uncached.client.describe_images.return_value = self.IMAGES
+        assert "ami-j1" == uncached.released_image("jammy")
+        assert 1 == uncached.client.describe_images.call_count
+
+    @mock.patch(MPATH + "time")
+    def test_expired_lookups_are_dropped(self, m_time):
+        """Storing a lookup removes the entries which have expired."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = self.IMAGES
+
+        filters = {
+            name: [{"Name": "name", "Values": [name]}]
+            for name in ("first", "second", "third")
+        }
+
+        m_time.monotonic.return_value = 0
+        ec2._describe_images("owner", filters["first"])
+        m_time.monotonic.return_value = 3000
+        ec2._describe_images("owner", filters["second"])
+        assert 2 == len(_IMAGE_CACHE)
+
+        m_time.monotonic.return_value = 3600
+        ec2._describe_images("owner", filters["third"])
+        assert [
+            ("us-east-1", "owner", (("name", (name,)),))
+            for name in ("second", "third")
+        ] == list(_IMAGE_CACHE)
+
+
+class TestFindImageSerials:
+    """Tests covering EC2._find_image_serials."""
+
+    def test_serials_of_several_images_in_one_call(self):
+        """Serials are parsed from the names of all images at once."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = {
+            "Images": [
+                _image("ami-j1", _released("jammy", "20220501"), "2022-05-01"),
+                _image("ami-f1", _daily("focal", "20220301.1"), "2022-03-01"),
+            ]
+        }
+
+        assert {
+            "ami-j1": "20220501",
+            "ami-f1": "20220301.1",
+        } == ec2._find_image_serials(["ami-j1", "ami-f1"])
+        assert 1 == ec2.client.describe_images.call_count
+
+    @pytest.mark.parametrize(
+        "images,message",
+        (
+            ([], "Could not find image: ami-j1"),
+            (
+                [_image("ami-j1", "custom-image", "2022-05-01")],
+                "Could not find image serial for image: ami-j1",
+            ),
+        ),
+        ids=("missing", "unparseable"),
+    )
+    def test_errors(self, images, message):
+        """Missing images and names without serial raise."""
+        ec2 = FakeEC2()
+        ec2.client.describe_images.return_value = {"Images": images}
+
+        with pytest.raises(Exception, match=message):
+            ec2.image_serial("ami-j1")
+
+
+class TestSearchFilters:
+    """Tests covering EC2._get_search_filters."""
+
+    @mock.patch(MPATH + "datetime")
+    def test_creation_date_window_uses_utc_date(self, m_datetime):
+        """The window starts at the UTC date, not the local one.
+
+        At 02:00Z it is still the previous day west of UTC, and the
+        newest daily images must not be excluded.
+        """
+        m_datetime.timedelta = datetime.timedelta
+        m_datetime.timezone = datetime.timezone
+        m_datetime.date.today.return_value = datetime.date(2022, 5, 9)
+        m_datetime.datetime.now.return_value = datetime.datetime(
+            2022, 5, 10, 2, 0, tzinfo=datetime.timezone.utc
+        )
+        filters = FakeEC2()._get_search_filters(
+            ["jammy"], "x86_64", ImageType.GENERIC, True, recent_days=2
+        )
+        assert {
+            "Name": "creation-date",
+            "Values": ("2022-05-10*", "2022-05-09*"),
+        } == filters[2]
+        m_datetime.datetime.now.assert_called_once_with(datetime.timezone.utc)
+        assert not m_datetime.date.today.called
+
+
+class TestLaunch:
+    """Tests covering EC2.launch."""
+
+    @mock.patch(MPATH + "EC2Instance")
+    def test_kwargs_go_to_instance_json(self, m_instance):
+        """Kwargs can't change the count or tagging of the launch."""
+        ec2 = FakeEC2()
+        ec2.tag = "test-tag"
+        ec2.key_pair = mock.Mock()
+        ec2.key_pair.name = "key"
+        ec2.resource.create_instances.return_value = [mock.Mock(id="i-1")]
+
+        instance = ec2.launch(
+            "ami-1",
+            wait=False,
+            count=3,
+            extra_tags=[],
+            tag_on_launch=False,
+            EbsOptimized=True,
+        )
+
+        assert m_instance.return_value == instance
+        ec2.resource.create_instances.assert_called_once_with(
+            ImageId="ami-1",
+            InstanceType="t3.micro",
+            KeyName="key",
+            MaxCount=1,
+            MinCount=1,
+            TagSpecifications=[
+                {
+                    "ResourceType": "instance",
+                    "Tags": [{"Key": "Name", "Value": "test-tag"}],
+                }
+            ],
+            count=3,
+            extra_tags=[],
+            tag_on_launch=False,
+            EbsOptimized=True,
+        )
+
+
+class TestLaunchMany:
+    """Tests covering EC2.launch_many."""
+
+    @mock.patch(MPATH + "EC2Instance")
+    def test_instances_are_tagged_by_the_launch_request(self, m_instance):
+        """Tags go in TagSpecifications instead of a later create_tags."""
+        ec2 = FakeEC2()
+        ec2.tag = "test-tag"
+        ec2.key_pair = mock.Mock()
+        ec2.key_pair.name = "key"
+        instances = [mock.Mock(id="i-1"), mock.Mock(id="i-2")]
+        ec2.resource.create_instances.return_value = instances
+
+        result = ec2.launch_many(
+            "ami-1",
+            2,
+            wait=False,
+            extra_tags=[{"Key": "owner", "Value": "me"}],
+        )
+
+        assert [m_instance.return_value] * 2 == result
+        assert [
+            mock.call(
+                ImageId="ami-1",
+                InstanceType="t3.micro",
+                KeyName="key",
+                MaxCount=2,
+                MinCount=2,
+                TagSpecifications=[
+                    {
+                        "ResourceType": "instance",
+                        "Tags": [
+                            {"Key": "Name", "Value": "test-tag"},
+                            {"Key": "owner", "Value": "me"},
+                        ],
+                    }
+                ],
+            )
+        ] == ec2.resource.create_instances.call_args_list
+        assert not ec2.client.create_tags.called
+
+    @mock.patch(MPATH + "EC2Instance")
+    def test_wait_polls_all_instances_with_one_waiter(self, m_instance):
+        """One instance_running waiter covers every launched instance."""
+        ec2 = FakeEC2()
+        ec2.tag = "test-tag"
+        ec2.key_pair = mock.Mock()
+        ec2.resource.create_instances.return_value = [
+            mock.Mock(id="i-1"),
+            mock.Mock(id="i-2"),
+        ]
+
+        ec2.launch_many("ami-1", 2)
+
+        ec2.client.get_waiter.assert_called_once_with("instance_running")
+        ec2.client.get_waiter.return_value.wait.assert_called_once_with(
+            InstanceIds=["i-1", "i-2"]
+        )
+        assert 2 == m_instance.return_value.wait.call_count
+
+
+class TestSnapshotPollDelay:
+    """Tests covering the snapshot_poll_delay setting."""
+
+    @pytest.mark.parametrize(
+        "delay,expected_delay,expected_attempts",
+        (
+            (None, 5, 180),
+            (30, 30, 30),
+            (0, 1, SNAPSHOT_TIMEOUT),
+            (-5, 1, SNAPSHOT_TIMEOUT),
+            (1000, SNAPSHOT_TIMEOUT, 1),
+        ),
+        ids=("default", "custom", "zero", "negative", "above-timeout"),
+    )
+    @mock.patch(MPATH + "_get_ec2_resource")
+    @mock.patch(MPATH + "_get_ec2_client")
+    @mock.patch(MPATH + "_get_session")
+    def test_delay_is_clamped_to_timeout(
+        self,
+        _m_session,
+        m_client,
+        _m_resource,
+        delay,
+        expected_delay,
+        expected_attempts,
+    ):
+        """The delay is kept between 1 and SNAPSHOT_TIMEOUT seconds."""
+        config = "[ec2]\n"
+        if delay is not None:
+            config += f"snapshot_poll_delay = {delay}\n"
+        ec2 = EC2(tag="tag", config_file=StringIO(config))
+        assert expected_delay == ec2.snapshot_poll_delay
+
+        image = mock.Mock(id="ami-1")
+        ec2._wait_for_snapshot(image)
+        waiter = m_client.return_value.get_waiter.return_value
+        waiter.wait.assert_called_once_with(
+            ImageIds=["ami-1"],
+            WaiterConfig={
+                "Delay": expected_delay,
+                "MaxAttempts": expected_attempts,
+            },
+        )
@@ -0,0 +1,47 @@
+"""Tests related to pycloudlib.ec2.util module."""
+from pycloudlib.ec2.util import (
+    _DATA_LOADER,
+    _get_ec2_client,
+    _get_ec2_resource,
+    _get_session,
+)
+
+
+# pylint: disable=protected-access
+class TestGetSession:
+    """Tests covering _get_session, _get_ec2_client and _get_ec2_resource."""
+
+    def test_sessions_share_the_data_loader(self):
+        """Service models are loaded once for all sessions."""
+        session1 = _get_session("key", "secret", "us-east-1")
+        session2 = _get_session("key", "secret", "us-east-1")
+        assert session1 is not session2
+        for session in (session1, session2):
+            assert _DATA_LOADER is session._session.get_component(
+                "data_loader"
+            )
+
+    def test_clients_and_resources_are_not_shared(self):
+        """Each session builds its own client and resource."""
+        session1 = _get_session("key", "secret", "us-east-1")
+        session2 = _get_session("key", "secret", "us-east-1")
+        assert _get_ec2_client(session1) is not _get_ec2_client(session2)
+        assert _get_ec2_resource(session1) is not _get_ec2_resource(session2)
+
+    def test_profile_changes_are_honored(self, tmpdir, monkeypatch):
+        """Sessions read AWS_PROFILE each time they are built."""
+        credentials = tmpdir.join("credentials")
+        credentials.write(
+            "[one]\naws_access_key_id = key1\naws_secret_access_key = s1\n"
+            "[two]\naws_access_key_id = key2\naws_secret_access_key = s2\n"
+        )
+        monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(credentials))
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+            monkeypatch.delenv(name, raising=False)
+
+        monkeypatch.setenv("AWS_PROFILE", "one")
+        client1 = _get_ec2_client(_get_session(None, None, "us-east-1"))
+        monkeypatch.setenv("AWS_PROFILE", "two")
+        client2 = _get_ec2_client(_get_session(None, None, "us-east-1"))
+        assert "key1" == client1._request_signer._credentials.access_key
+        assert "key2" == client2._request_signer._credentials.access_key
@@ -5,9 +5,16 @@ import base64
 
 import boto3
 import botocore
+from botocore.config import Config
 
 from pycloudlib.util import get_timestamped_tag
 
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+# Loader of botocore service models shared by all sessions, so the EC2
+# model is parsed once rather than for every EC2 object
+_DATA_LOADER = botocore.loaders.create_loader()
+
 
 def _tag_resource(resource, tag_value=None):
     """Tag a resource with the specified tag.
@@ -47,6 +54,10 @@ def _decode_console_output_as_bytes(parsed, **kwargs):
 def _get_session(access_key_id, secret_access_key, region):
     """Get EC2 session.
 
+    A new session is built on each call, as boto3 sessions are not
+    thread-safe and so cannot be shared between EC2 objects. The sessions
+    share one data loader, which caches the parsed service models.
+
     Args:
         access_key_id: user's access key ID
         secret_access_key: user's secret access key
@@ -57,6 +68,7 @@ def _get_session(access_key_id, secret_access_key, region):
 
     """
     mysess = botocore.session.get_session()
+    mysess.register_component("data_loader", _DATA_LOADER)
     mysess.unregister(
         "after-call.ec2.GetConsoleOutput",
         botocore.handlers.decode_console_output,
@@ -70,3 +82,57 @@ def _get_session(access_key_id, secret_access_key, region):
         aws_secret_access_key=secret_access_key,
         region_name=region,
     )
+
+
+def _get_client_config(max_pool_connections):
+    """Get the botocore config used for EC2 clients and resources.
+
+    Adaptive retries back off automatically when requests get throttled.
+
+    Args:
+        max_pool_connections: size of the HTTP connection pool
+
+    Returns:
+        botocore config object
+
+    """
+    return Config(
+        max_pool_connections=max_pool_connections,
+        retries={"mode": "adaptive", "max_attempts": 10},
+    )
+
+
+def _get_ec2_client(
+    session, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS
+):
+    """Get the EC2 client of a session.
+
+    Args:
+        session: boto3 session object
+        max_pool_connections: size of the HTTP connection pool
+
+    Returns:
+        boto3 EC2 client object
+
+    """
+    return session.client(
+        "ec2", config=_get_client_config(max_pool_connections)
+    )
+
+
+def _get_ec2_resource(
+    session, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS
+):
+    """Get the EC2 resource of a session.
+
+    Args:
+        session: boto3 session object
+        max_pool_connections: size of the HTTP connection pool
+
+    Returns:
+        boto3 EC2 resource object
+
+    """
+    return session.resource(
+        "ec2", config=_get_client_config(max_pool_connections)
+    )
@@ -21,6 +21,8 @@ class VPC:
             vpc_id: Optional ID of existing VPC object to return
         """
         self.vpc = vpc
+        self._subnet_ids = None
+        self._security_group_ids = None
 
     @classmethod
     def create(cls, resource, name, ipv4_cidr="192.168.1.0/20"):
@@ -80,6 +82,34 @@ class VPC:
                 return tag["Value"]
         return "NO-TAG-NAME-PRESENT"
 
+    @property
+    def subnet_ids(self):
+        """Subnet IDs of the VPC.
+
+        Looked up once, use refresh() to look them up again.
+        """
+        if self._subnet_ids is None:
+            self._subnet_ids = [subnet.id for subnet in self.vpc.subnets.all()]
+        return self._subnet_ids
+
+    @property
+    def security_group_ids(self):
+        """Security group IDs of the VPC.
+
+        Looked up once, use refresh() to look them up again.
+        """
+        if self._security_group_ids is None:
+            self._security_group_ids = [
+                security_group.id
+                for security_group in self.vpc.security_groups.all()
+            ]
+        return self._security_group_ids
+
+    def refresh(self):
+        """Drop the cached subnet and security group IDs."""
+        self._subnet_ids = None
+        self._security_group_ids = None
+
     @classmethod
     def _create_internet_gateway(cls, resource, vpc):
         """Create Internet Gateway and assign to VPC.
@@ -219,3 +249,4 @@ class VPC:
         if self.vpc:
             logger.debug("deleting vpc %s", self.vpc.id)
             self.vpc.delete()
+        self.refresh()
@@ -23,6 +23,7 @@ class KeyPair:
             self.private_key_path = private_key_path
         else:
             self.private_key_path = self.public_key_path.replace(".pub", "")
+        self._public_key_content = None
 
     def __str__(self):
         """Create string representation of class."""
@@ -34,8 +35,17 @@ class KeyPair:
     def public_key_content(self):
         """Read the contents of the public key.
 
+        The file is only read once, use invalidate() to read it again.
+
         Returns:
             output of public key
 
         """
-        return open(self.public_key_path, encoding="utf-8").read()
+        if self._public_key_content is None:
+            with open(self.public_key_path, encoding="utf-8") as f:
+                self._public_key_content = f.read()
+        return self._public_key_content
+
+    def invalidate(self):
+        """Drop the cached public key so it is read again on next access."""
+        self._public_key_content = None
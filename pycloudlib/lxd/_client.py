@@ -0,0 +1,116 @@
+# This file is part of pycloudlib. See LICENSE file for license information.
+"""Minimal client for the local LXD REST API."""
+import http.client
+import json
+import os
+import socket
+import threading
+
+SOCKET_PATHS = (
+    "/var/snap/lxd/common/lxd/unix.socket",
+    "/var/lib/lxd/unix.socket",
+)
+
+
+class LXDAPIError(Exception):
+    """Error talking to the LXD REST API."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a unix socket."""
+
+    def __init__(self, socket_path, timeout=10):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        """Connect to the unix socket instead of a TCP host."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class LXDSocketClient:
+    """Query the local LXD daemon over its unix socket.
+
+    A single keep-alive connection is reused between requests, avoiding
+    an `lxc` process per query.
+    """
+
+    def __init__(self, socket_path):
+        """Set up client.
+
+        Args:
+            socket_path: path of the LXD unix socket
+        """
+        self.socket_path = socket_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the metadata of a synchronous GET request.
+
+        Args:
+            path: API path, e.g. /1.0/instances/<name>/state
+
+        Raises: LXDAPIError on connection failures or error responses.
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = _UnixHTTPConnection(self.socket_path)
+            try:
+                self._conn.request("GET", path)
+                response = self._conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._conn.close()
+                self._conn = None
+                raise LXDAPIError(
+                    f"Request to {self.socket_path} failed: {e}"
+                ) from e
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise LXDAPIError(f"Invalid response for {path}: {body}") from e
+        if response.status != 200 or data.get("type") != "sync":
+            raise LXDAPIError(
+                f"GET {path} failed ({response.status}): {data.get('error')}"
+            )
+        return data["metadata"]
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def find_socket():
+    """Return the path of an accessible local LXD socket or None."""
+    lxd_dir = os.environ.get("LXD_DIR")
+    paths = (os.path.join(lxd_dir, "unix.socket"),) if lxd_dir else ()
+    for path in paths + SOCKET_PATHS:
+        if os.path.exists(path) and os.access(path, os.R_OK | os.W_OK):
+            return path
+    return None
+
+
+def get_client():
+    """Return the shared LXDSocketClient, or None without a local socket."""
+    global _CLIENT  # pylint: disable=global-statement
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            socket_path = find_socket()
+            if socket_path:
+                _CLIENT = LXDSocketClient(socket_path)
+        return _CLIENT
@@ -12,6 +12,10 @@ from pycloudlib.lxd.defaults import base_vm_profiles
 from pycloudlib.lxd.instance import LXDInstance, LXDVirtualMachineInstance
 from pycloudlib.util import subp
 
+# lxc is run with close_fds=False so CPython spawns it with posix_spawn
+# rather than fork+exec. Descriptors are not inheritable by default
+# (PEP 446), so none leak into lxc.
+
 
 class _BaseLXD(BaseCloud):
     """LXD Base Cloud Class."""
@@ -38,7 +42,7 @@ class _BaseLXD(BaseCloud):
 
         """
         self._log.debug("cloning %s to %s", base, new_instance_name)
-        subp(["lxc", "copy", base, new_instance_name])
+        subp(["lxc", "copy", base, new_instance_name], close_fds=False)
         return LXDInstance(new_instance_name)
 
     def create_profile(self, profile_name, profile_config, force=False):
@@ -53,7 +57,9 @@ class _BaseLXD(BaseCloud):
             profile_config: Config to be added to the new profile
             force: Force the profile creation if it already exists
         """
-        profile_yaml = subp(["lxc", "profile", "list", "--format", "yaml"])
+        profile_yaml = subp(
+            ["lxc", "profile", "list", "--format", "yaml"], close_fds=False
+        )
         profile_list = [
             profile["name"] for profile in yaml.safe_load(profile_yaml)
         ]
@@ -66,11 +72,15 @@ class _BaseLXD(BaseCloud):
 
         if force:
             self._log.debug("Deleting current profile %s ...", profile_name)
-            subp(["lxc", "profile", "delete", profile_name])
+            subp(["lxc", "profile", "delete", profile_name], close_fds=False)
 
         self._log.debug("Creating profile %s ...", profile_name)
-        subp(["lxc", "profile", "create", profile_name])
-        subp(["lxc", "profile", "edit", profile_name], data=profile_config)
+        subp(["lxc", "profile", "create", profile_name], close_fds=False)
+        subp(
+            ["lxc", "profile", "edit", profile_name],
+            data=profile_config,
+            close_fds=False,
+        )
 
     def delete_instance(self, instance_name, wait=True):
         """Delete an instance.
@@ -107,7 +117,9 @@ class _BaseLXD(BaseCloud):
             <image_id>``, or the empty dict if either the command or YAML load
             fails.
         """
-        raw_image_info = subp(["lxc", "image", "info", image_id], rcs=())
+        raw_image_info = subp(
+            ["lxc", "image", "info", image_id], rcs=(), close_fds=False
+        )
         if raw_image_info.ok:
             try:
                 return yaml.safe_load(raw_image_info)
@@ -282,7 +294,7 @@ class _BaseLXD(BaseCloud):
         )
 
         print(cmd)
-        result = subp(cmd)
+        result = subp(cmd, close_fds=False)
 
         if not name:
             name = result.split("Instance name is: ")[1]
@@ -483,7 +495,7 @@ class _BaseLXD(BaseCloud):
         """
         self._log.debug("Deleting image: '%s'", image_id)
 
-        subp(["lxc", "image", "delete", image_id])
+        subp(["lxc", "image", "delete", image_id], close_fds=False)
         self._log.debug("Deleted %s", image_id)
 
     def snapshot(self, instance, clean=True, name=None):
@@ -1,11 +1,34 @@
 # This file is part of pycloudlib. See LICENSE file for license information.
 """LXD instance."""
+import random
 import re
 import time
+import urllib.parse
 
 from pycloudlib.instance import BaseInstance
+from pycloudlib.lxd._client import LXDAPIError, get_client
 from pycloudlib.util import subp
 
+# lxc is run with close_fds=False so CPython spawns it with posix_spawn
+# rather than fork+exec. Descriptors are not inheritable by default
+# (PEP 446), so none leak into lxc.
+
+# Seconds to wait for an instance to report an IP address
+IP_TIMEOUT = 150
+# Truncated exponential backoff between IP address checks, in seconds
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 10
+BACKOFF_JITTER = 0.1
+
+# `lxc list` arguments around the instance name to print its IPv4 address
+_LXC_LIST_PREFIX = ("lxc", "list")
+_LXC_LIST_SUFFIX = ("-c4", "--format", "csv")
+
+# Interface names LXD gives the instance NIC in containers and VMs
+_DEFAULT_NICS = ("eth0", "enp5s0")
+# Interfaces set up inside the instance, e.g. by docker or a nested LXD
+_VIRTUAL_NIC_PREFIXES = ("br-", "docker", "lxdbr", "veth", "virbr")
+
 MISSING_AGENT_MSG = (
     "Many Xenial images do not support `%s` due to missing lxd-agent:"
     " you may see unavoidable failures.\n"
@@ -13,6 +36,14 @@ MISSING_AGENT_MSG = (
 )
 
 
+def _parse_instance_url(url):
+    """Return (name, project) of an LXD instance API URL."""
+    parsed = urllib.parse.urlsplit(url)
+    name = urllib.parse.unquote(parsed.path.rsplit("/", 1)[-1])
+    project = urllib.parse.parse_qs(parsed.query).get("project", ["default"])
+    return name, project[0]
+
+
 class LXDInstance(BaseInstance):
     """LXD backed instance."""
 
@@ -46,6 +77,8 @@ class LXDInstance(BaseInstance):
         self.execute_via_ssh = execute_via_ssh
         self.series = series
         self._is_ephemeral = ephemeral
+        self._missing_agent_warned = set()
+        self._api_project = None
 
     def __repr__(self):
         """Create string representation for class."""
@@ -66,7 +99,14 @@ class LXDInstance(BaseInstance):
             self.username,
             "--",
         ]
-        return subp(base_cmd + list(command), rcs=None)
+        return subp(base_cmd + list(command), rcs=None, close_fds=False)
+
+    def _warn_missing_agent(self, operation):
+        """Warn once per operation when lxd-agent is likely missing."""
+        if self.series != "xenial" or operation in self._missing_agent_warned:
+            return
+        self._missing_agent_warned.add(operation)
+        self._log.warning(MISSING_AGENT_MSG, operation)
 
     @property
     def is_vm(self):
@@ -78,7 +118,7 @@ class LXDInstance(BaseInstance):
             boolean if virtual-machine
         """
         if self._is_vm is None:
-            result = subp(["lxc", "info", self.name])
+            result = subp(["lxc", "info", self.name], close_fds=False)
 
             try:
                 info_type = re.findall(r"Type: (.*)", result)[0]
@@ -94,49 +134,133 @@ class LXDInstance(BaseInstance):
         """Return instance name."""
         return self._name
 
+    def _find_api_project(self, client):
+        """Return the LXD project of this instance on the local socket.
+
+        The socket does not know the current project or remote of the `lxc`
+        client, so a project is only returned when exactly one local
+        instance has this name. Returns None otherwise.
+        """
+        if self._api_project is None and ":" not in self.name:
+            urls = client.get("/1.0/instances?all-projects=true")
+            projects = [
+                project
+                for name, project in map(_parse_instance_url, urls)
+                if name == self.name
+            ]
+            if len(projects) == 1:
+                self._api_project = projects[0]
+        return self._api_project
+
+    def _ip_from_api(self, client):
+        """Return (IPv4 address or None, details) from the LXD REST API.
+
+        Addresses on the default instance NIC are preferred and interfaces
+        of bridges inside the instance are skipped.
+
+        Returns (None, None) when the API cannot answer for this instance so
+        the caller can fall back to `lxc list`.
+        """
+        try:
+            project = self._find_api_project(client)
+            if project is None:
+                self._log.debug(
+                    "Falling back to lxc list: %s not found unambiguously"
+                    " on the local LXD socket",
+                    self.name,
+                )
+                return None, None
+            state = client.get(
+                "/1.0/instances/{}/state?project={}".format(
+                    urllib.parse.quote(self.name, safe=""),
+                    urllib.parse.quote(project, safe=""),
+                )
+            )
+        except LXDAPIError as e:
+            self._log.debug("Falling back to lxc list: %s", e)
+            return None, None
+        network = state.get("network") or {}
+        devices = sorted(
+            (device not in _DEFAULT_NICS, device)
+            for device in network
+            if device != "lo" and not device.startswith(_VIRTUAL_NIC_PREFIXES)
+        )
+        for _, device in devices:
+            for address in network[device].get("addresses") or []:
+                if (
+                    address.get("family") == "inet"
+                    and address.get("scope") == "global"
+                ):
+                    return address["address"], None
+        return None, "status: {} network: {}".format(
+            state.get("status"), network
+        )
+
+    def _ip_from_lxc_list(self, command):
+        """Return (IPv4 address or None, details) from `lxc list`."""
+        result = subp(command, close_fds=False)
+        if result.ok and result.stdout:
+            try:
+                # Expect "<ip> (<interface>)" when network fully configured
+                ip_address, _dev = result.stdout.split()
+                return ip_address, None
+            except ValueError:
+                self._log.debug(
+                    "Unable to parse output of cmd: %s. Expected"
+                    " <ip> (<interface>), got: %s",
+                    command,
+                    result.stdout,
+                )
+        return None, "exit:{} stdout: {} stderr: {}".format(
+            result.return_code, result.stdout, result.stderr
+        )
+
     @property
     def ip(self):
         """Return IP address of instance.
 
+        The instance state is read from the local LXD socket when it is
+        accessible, otherwise `lxc list` is used. Either is polled with a
+        truncated exponential backoff until an address shows up or
+        IP_TIMEOUT seconds have passed.
+
         Returns:
             IP address assigned to instance.
 
         Raises: TimeoutError when exhausting retries trying to parse lxc list
             for ip addresses.
         """
-        retries = 150
+        deadline = time.monotonic() + IP_TIMEOUT
+        client = get_client()
+        lxc_list_cmd = [
+            *_LXC_LIST_PREFIX,
+            "^{}$".format(self.name),
+            *_LXC_LIST_SUFFIX,
+        ]
+        attempt = 0
+
+        while True:
+            if client:
+                ip_address, details = self._ip_from_api(client)
+                if not (ip_address or details):
+                    client = None
+            if not client:
+                ip_address, details = self._ip_from_lxc_list(lxc_list_cmd)
+            if ip_address:
+                return ip_address
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            delay = min(
+                BACKOFF_CAP, BACKOFF_BASE * 2**attempt
+            ) + random.uniform(0, BACKOFF_JITTER)
+            time.sleep(min(delay, remaining))
+            attempt += 1
 
-        while retries != 0:
-            command = [
-                "lxc",
-                "list",
-                "^{}$".format(self.name),
-                "-c4",
-                "--format",
-                "csv",
-            ]
-            result = subp(command)
-            if result.ok and result.stdout:
-                ip_address = None
-                try:
-                    # Expect "<ip> (<interface>)" when network fully configured
-                    ip_address, _dev = result.stdout.split()
-                except ValueError:
-                    self._log.debug(
-                        "Unable to parse output of cmd: %s. Expected"
-                        " <ip> (<interface>), got: %s. Retrying %d time(s)...",
-                        command,
-                        result.stdout,
-                        retries,
-                    )
-                if ip_address:
-                    return ip_address
-            retries -= 1
-            time.sleep(1)
         raise TimeoutError(
-            "Unable to determine IP address after 150 retries."
-            " exit:{} stdout: {} stderr: {}".format(
-                result.return_code, result.stdout, result.stderr
+            "Unable to determine IP address after {} seconds. {}".format(
+                IP_TIMEOUT, details
             )
         )
 
@@ -150,7 +274,7 @@ class LXDInstance(BaseInstance):
             boolean if ephemeral
         """
         if self._is_ephemeral is None:
-            result = subp(["lxc", "info", self.name])
+            result = subp(["lxc", "info", self.name], close_fds=False)
 
             try:
                 info_type = re.findall(r"Type: (.*)", result)[0]
@@ -174,7 +298,7 @@ class LXDInstance(BaseInstance):
             Reported status from lxc info
 
         """
-        result = subp(["lxc", "info", self.name])
+        result = subp(["lxc", "info", self.name], close_fds=False)
         try:
             return re.findall(r"Status: (.*)", result)[0]
         except IndexError:
@@ -192,7 +316,9 @@ class LXDInstance(BaseInstance):
         """
         self._log.debug("getting console log for %s", self.name)
         try:
-            return subp(["lxc", "console", self.name, "--show-log"])
+            return subp(
+                ["lxc", "console", self.name, "--show-log"], close_fds=False
+            )
         except RuntimeError as exc:
             if "Instance is not container type" not in str(exc):
                 raise
@@ -218,7 +344,7 @@ class LXDInstance(BaseInstance):
             # instance will be deleted once it is stopped
             self.shutdown(wait=False)
         else:
-            subp(["lxc", "delete", self.name, "--force"])
+            subp(["lxc", "delete", self.name, "--force"], close_fds=False)
 
         if wait:
             self.wait_for_delete()
@@ -230,7 +356,10 @@ class LXDInstance(BaseInstance):
             snapshot_name: the name to delete
         """
         self._log.debug("deleting snapshot %s/%s", self.name, snapshot_name)
-        subp(["lxc", "delete", "%s/%s" % (self.name, snapshot_name)])
+        subp(
+            ["lxc", "delete", "%s/%s" % (self.name, snapshot_name)],
+            close_fds=False,
+        )
 
     def edit(self, key, value):
         """Edit the config of the instance.
@@ -240,7 +369,7 @@ class LXDInstance(BaseInstance):
             value: The new value to set the key to
         """
         self._log.debug("editing %s with %s=%s", self.name, key, value)
-        subp(["lxc", "config", "set", self.name, key, value])
+        subp(["lxc", "config", "set", self.name, key, value], close_fds=False)
 
     def pull_file(self, remote_path, local_path):
         """Pull file from an instance.
@@ -259,8 +388,7 @@ class LXDInstance(BaseInstance):
             super().pull_file(remote_path, local_path)
             return
 
-        if self.series == "xenial":
-            self._log.warning(MISSING_AGENT_MSG, "lxc file pull")
+        self._warn_missing_agent("lxc file pull")
 
         if remote_path[0] != "/":
             remote_pwd = self.execute("pwd")
@@ -274,7 +402,8 @@ class LXDInstance(BaseInstance):
                 "pull",
                 "%s%s" % (self.name, remote_path),
                 local_path,
-            ]
+            ],
+            close_fds=False,
         )
 
     def push_file(self, local_path, remote_path):
@@ -294,8 +423,7 @@ class LXDInstance(BaseInstance):
             super().push_file(local_path, remote_path)
             return
 
-        if self.series == "xenial":
-            self._log.warning(MISSING_AGENT_MSG, "lxc file push")
+        self._warn_missing_agent("lxc file push")
 
         if remote_path[0] != "/":
             remote_pwd = self.execute("pwd")
@@ -309,7 +437,8 @@ class LXDInstance(BaseInstance):
                 "push",
                 local_path,
                 "%s%s" % (self.name, remote_path),
-            ]
+            ],
+            close_fds=False,
         )
 
     def _do_restart(self, force=False, **kwargs):
@@ -326,7 +455,7 @@ class LXDInstance(BaseInstance):
         cmd = ["lxc", "restart", self.name]
         if force:
             cmd.append("--force")
-        subp(cmd)
+        subp(cmd, close_fds=False)
 
     def restore(self, snapshot_name):
         """Restore instance from a specific snapshot.
@@ -337,7 +466,7 @@ class LXDInstance(BaseInstance):
         self._log.debug(
             "restoring %s from snapshot %s", self.name, snapshot_name
         )
-        subp(["lxc", "restore", self.name, snapshot_name])
+        subp(["lxc", "restore", self.name, snapshot_name], close_fds=False)
 
     def shutdown(self, wait=True, force=False, **kwargs):
         """Shutdown instance.
@@ -355,7 +484,7 @@ class LXDInstance(BaseInstance):
         if force:
             cmd.append("--force")
 
-        subp(cmd)
+        subp(cmd, close_fds=False)
 
         if wait:
             self.wait_for_stop()
@@ -377,7 +506,7 @@ class LXDInstance(BaseInstance):
             cmd.append("--stateful")
 
         self._log.debug("creating snapshot %s", snapshot_name)
-        subp(cmd)
+        subp(cmd, close_fds=False)
         return snapshot_name
 
     def snapshot(self, snapshot_name):
@@ -406,7 +535,7 @@ class LXDInstance(BaseInstance):
         ]
 
         self._log.debug("Publishing snapshot %s", snapshot_name)
-        subp(cmd)
+        subp(cmd, close_fds=False)
         return "local:{}".format(snapshot_name)
 
     def start(self, wait=True):
@@ -419,7 +548,7 @@ class LXDInstance(BaseInstance):
             return
 
         self._log.debug("starting %s", self.name)
-        subp(["lxc", "start", self.name])
+        subp(["lxc", "start", self.name], close_fds=False)
 
         if wait:
             self.wait()
@@ -448,7 +577,8 @@ class LXDInstance(BaseInstance):
                     "-cs",
                     "--format",
                     "csv",
-                ]
+                ],
+                close_fds=False,
             )
 
             if result == desired_state:
@@ -482,7 +612,8 @@ class LXDInstance(BaseInstance):
                     subp(
                         "lxc list --columns N {} --format csv".format(
                             self.name
-                        ).split()
+                        ).split(),
+                        close_fds=False,
                     )
                 )
             except ValueError:
@@ -501,8 +632,7 @@ class LXDVirtualMachineInstance(LXDInstance):
         if self.execute_via_ssh:
             return super()._run_command(command, stdin)
 
-        if self.series == "xenial":
-            self._log.warning(MISSING_AGENT_MSG, "lxc exec")
+        self._warn_missing_agent("lxc exec")
 
         return super()._run_command(command, stdin)
 
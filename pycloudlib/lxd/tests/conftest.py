@@ -0,0 +1,42 @@
+"""Common fixtures for pycloudlib.lxd tests."""
+from unittest import mock
+
+import pytest
+
+from pycloudlib.lxd.instance import LXDInstance
+
+M_PATH = "pycloudlib.lxd.instance."
+
+
+@pytest.fixture
+def m_subp():
+    """Mock subp used by pycloudlib.lxd.instance."""
+    with mock.patch(M_PATH + "subp") as m:
+        yield m
+
+
+@pytest.fixture
+def m_get_client():
+    """Mock the LXD socket client lookup; no socket is found by default."""
+    with mock.patch(M_PATH + "get_client", return_value=None) as m_client:
+        yield m_client
+
+
+@pytest.fixture
+def m_time():
+    """Mock time in pycloudlib.lxd.instance with a clock driven by sleep."""
+    clock = [0.0]
+
+    def _sleep(seconds):
+        clock[0] += seconds
+
+    with mock.patch(M_PATH + "time") as m:
+        m.monotonic.side_effect = lambda: clock[0]
+        m.sleep.side_effect = _sleep
+        yield m
+
+
+@pytest.fixture
+def lxd_instance():
+    """Return an LXDInstance named "test"."""
+    return LXDInstance(name="test")
@@ -0,0 +1,63 @@
+"""Tests for pycloudlib.lxd._client."""
+import json
+from unittest import mock
+
+import pytest
+
+from pycloudlib.lxd._client import LXDAPIError, LXDSocketClient, find_socket
+
+M_PATH = "pycloudlib.lxd._client."
+
+
+class TestFindSocket:
+    """Tests covering pycloudlib.lxd._client.find_socket."""
+
+    def test_lxd_dir_takes_precedence(self, tmpdir, monkeypatch):
+        """The socket in $LXD_DIR is preferred over default paths."""
+        tmpdir.join("unix.socket").write("")
+        monkeypatch.setenv("LXD_DIR", str(tmpdir))
+        assert tmpdir.join("unix.socket") == find_socket()
+
+    @mock.patch(M_PATH + "os.path.exists", return_value=False)
+    def test_none_without_socket(self, _m_exists, monkeypatch):
+        """None is returned when no socket exists."""
+        monkeypatch.delenv("LXD_DIR", raising=False)
+        assert find_socket() is None
+
+
+class TestLXDSocketClientGet:
+    """Tests covering pycloudlib.lxd._client.LXDSocketClient.get."""
+
+    @mock.patch(M_PATH + "_UnixHTTPConnection")
+    def test_reuses_connection_and_returns_metadata(self, m_conn):
+        """Metadata of sync responses is returned over one connection."""
+        response = m_conn.return_value.getresponse.return_value
+        response.status = 200
+        response.read.return_value = json.dumps(
+            {"type": "sync", "metadata": {"status": "Running"}}
+        ).encode()
+        client = LXDSocketClient("/lxd.socket")
+        assert {"status": "Running"} == client.get("/1.0/instances/a/state")
+        assert {"status": "Running"} == client.get("/1.0/instances/a/state")
+        m_conn.assert_called_once_with("/lxd.socket")
+
+    @mock.patch(M_PATH + "_UnixHTTPConnection")
+    def test_error_response_raises(self, m_conn):
+        """Non-200 responses raise LXDAPIError."""
+        response = m_conn.return_value.getresponse.return_value
+        response.status = 404
+        response.read.return_value = json.dumps(
+            {"type": "error", "error": "Instance not found"}
+        ).encode()
+        with pytest.raises(LXDAPIError, match="Instance not found"):
+            LXDSocketClient("/lxd.socket").get("/1.0/instances/a/state")
+
+    @mock.patch(M_PATH + "_UnixHTTPConnection")
+    def test_connection_error_resets_connection(self, m_conn):
+        """A failed request drops the connection so the next one reconnects."""
+        m_conn.return_value.request.side_effect = ConnectionRefusedError()
+        client = LXDSocketClient("/lxd.socket")
+        for _ in range(2):
+            with pytest.raises(LXDAPIError):
+                client.get("/1.0")
+        assert 2 == m_conn.call_count
@@ -101,7 +101,9 @@ class TestProfileCreation:
         expected_msg = "The profile named test_profile already exists"
         assert expected_msg in fake_stdout.getvalue().strip()
         assert m_subp.call_args_list == [
-            mock.call(["lxc", "profile", "list", "--format", "yaml"])
+            mock.call(
+                ["lxc", "profile", "list", "--format", "yaml"], close_fds=False
+            )
         ]
 
     @mock.patch("pycloudlib.lxd.cloud.subp")
@@ -121,11 +123,19 @@ class TestProfileCreation:
         )
 
         assert m_subp.call_args_list == [
-            mock.call(["lxc", "profile", "list", "--format", "yaml"]),
-            mock.call(["lxc", "profile", "delete", profile_name]),
-            mock.call(["lxc", "profile", "create", profile_name]),
             mock.call(
-                ["lxc", "profile", "edit", profile_name], data=profile_config
+                ["lxc", "profile", "list", "--format", "yaml"], close_fds=False
+            ),
+            mock.call(
+                ["lxc", "profile", "delete", profile_name], close_fds=False
+            ),
+            mock.call(
+                ["lxc", "profile", "create", profile_name], close_fds=False
+            ),
+            mock.call(
+                ["lxc", "profile", "edit", profile_name],
+                data=profile_config,
+                close_fds=False,
             ),
         ]
 
@@ -144,10 +154,16 @@ class TestProfileCreation:
         )
 
         assert m_subp.call_args_list == [
-            mock.call(["lxc", "profile", "list", "--format", "yaml"]),
-            mock.call(["lxc", "profile", "create", profile_name]),
             mock.call(
-                ["lxc", "profile", "edit", profile_name], data=profile_config
+                ["lxc", "profile", "list", "--format", "yaml"], close_fds=False
+            ),
+            mock.call(
+                ["lxc", "profile", "create", profile_name], close_fds=False
+            ),
+            mock.call(
+                ["lxc", "profile", "edit", profile_name],
+                data=profile_config,
+                close_fds=False,
             ),
         ]
 
@@ -167,7 +183,9 @@ class Test_LxcImageInfo:  # pylint: disable=W0212
         )._lxc_image_info(image_id)
 
         assert content == ret
-        expected_call = mock.call(["lxc", "image", "info", image_id], rcs=())
+        expected_call = mock.call(
+            ["lxc", "image", "info", image_id], rcs=(), close_fds=False
+        )
         assert [expected_call] == m_subp.call_args_list
 
     def test_command_failure_returns_empty_dict(self, m_subp):
@@ -4,50 +4,67 @@ from unittest import mock
 
 import pytest
 
+from pycloudlib.lxd._client import LXDAPIError
 from pycloudlib.lxd.instance import LXDInstance, LXDVirtualMachineInstance
 from pycloudlib.result import Result
 
+LO_STATE = {
+    "addresses": [{"family": "inet", "address": "127.0.0.1", "scope": "local"}]
+}
+
+
+def _nic_state(address):
+    """Return the LXD state of a NIC with a global IPv4 address."""
+    return {
+        "addresses": [
+            {"family": "inet", "address": address, "scope": "global"}
+        ]
+    }
+
 
 class TestRestart:
     """Tests covering pycloudlib.lxd.instance.Instance.restart."""
 
-    @pytest.mark.parametrize("force", (False, True))
-    @mock.patch("pycloudlib.lxd.instance.subp")
-    def test_restart_calls_lxc_cmd_with_force_param(self, m_subp, force):
+    @pytest.mark.parametrize("force", (False, True), ids=("soft", "force"))
+    def test_restart_calls_lxc_cmd_with_force_param(
+        self, m_subp, lxd_instance, force
+    ):
         """Honor force param on restart."""
-        instance = LXDInstance(name="my_vm")
-        instance._do_restart(force=force)  # pylint: disable=protected-access
+        lxd_instance._do_restart(force=force)  # pylint: disable=W0212
         if force:
             assert "--force" in m_subp.call_args[0][0]
         else:
             assert "--force" not in m_subp.call_args[0][0]
 
+    @pytest.mark.usefixtures("m_subp")
     @mock.patch("pycloudlib.lxd.instance.LXDInstance.shutdown")
-    @mock.patch("pycloudlib.lxd.instance.subp")
-    def test_restart_does_not_shutdown(self, _m_subp, m_shutdown):
+    def test_restart_does_not_shutdown(self, m_shutdown, lxd_instance):
         """Don't shutdown (stop) instance on restart."""
-        instance = LXDInstance(name="my_vm")
-        instance._do_restart()  # pylint: disable=protected-access
+        lxd_instance._do_restart()  # pylint: disable=protected-access
         assert not m_shutdown.called
 
 
 class TestExecute:
     """Tests covering pycloudlib.lxd.instance.Instance.execute."""
 
-    def test_all_rcs_acceptable_when_using_exec(self):
+    def test_all_rcs_acceptable_when_using_exec(self, m_subp):
         """Test that we invoke util.subp with rcs=None for exec calls.
 
         rcs=None means that we will get a Result object back for all return
         codes, rather than an exception for non-zero return codes.
         """
         instance = LXDInstance(None, execute_via_ssh=False)
-        with mock.patch("pycloudlib.lxd.instance.subp") as m_subp:
-            instance.execute("some_command")
+        instance.execute("some_command")
         assert 1 == m_subp.call_count
         args, kwargs = m_subp.call_args
         assert "exec" in args[0]
         assert kwargs.get("rcs", mock.sentinel.not_none) is None
 
+    def test_exec_keeps_inherited_fds_open(self, m_subp):
+        """Exec runs lxc with close_fds=False so it can be posix_spawn'ed."""
+        LXDInstance(None, execute_via_ssh=False).execute("some_command")
+        assert m_subp.call_args[1]["close_fds"] is False
+
 
 class TestVirtualMachineXenialAgentOperations:  # pylint: disable=W0212
     """Tests covering pycloudlib.lxd.instance.LXDVirtualMachineInstance."""
@@ -55,7 +72,6 @@ class TestVirtualMachineXenialAgentOperations:  # pylint: disable=W0212
     # Key information we want in the logs when using non-ssh Xenial instances.
     _missing_agent_msg = "missing lxd-agent"
 
-    @mock.patch("pycloudlib.lxd.instance.subp")
     def test_exec_with_run_command_on_xenial_machine(self, m_subp, caplog):
         """Test exec does not work with xenial vm."""
         instance = LXDVirtualMachineInstance(
@@ -66,7 +82,6 @@ class TestVirtualMachineXenialAgentOperations:  # pylint: disable=W0212
         assert self._missing_agent_msg in caplog.text
         assert m_subp.call_count == 1
 
-    @mock.patch("pycloudlib.lxd.instance.subp")
     def test_file_pull_with_agent_on_xenial_machine(self, m_subp, caplog):
         """Test file pull does not work with xenial vm."""
         instance = LXDVirtualMachineInstance(
@@ -77,7 +92,6 @@ class TestVirtualMachineXenialAgentOperations:  # pylint: disable=W0212
         assert self._missing_agent_msg in caplog.text
         assert m_subp.call_count == 1
 
-    @mock.patch("pycloudlib.lxd.instance.subp")
     def test_file_push_with_agent_on_xenial_machine(self, m_subp, caplog):
         """Test file push does not work with xenial vm."""
         instance = LXDVirtualMachineInstance(
@@ -96,6 +110,23 @@ class TestVirtualMachineXenialAgentOperations:  # pylint: disable=W0212
         assert expected_msg in caplog.messages
         assert m_subp.call_count == 1
 
+    def test_missing_agent_warning_logged_once(self, m_subp, caplog):
+        """The xenial warning is logged once per operation per instance."""
+        instance = LXDVirtualMachineInstance(
+            None, execute_via_ssh=False, series="xenial"
+        )
+
+        for _ in range(3):
+            instance.push_file("/some/file", "/some/local/file")
+        instance.pull_file("/some/file", "/some/local/file")
+        assert 1 == sum("lxc file push" in msg for msg in caplog.messages)
+        assert 1 == sum("lxc file pull" in msg for msg in caplog.messages)
+        assert 4 == m_subp.call_count
+
+
+# Backoff delays (without jitter) until the 150 second IP_TIMEOUT is spent
+TIMEOUT_SLEEPS = [0.5, 1, 2, 4, 8] + [10] * 13 + [4.5]
+
 
 class TestIP:
     """Tests covering pycloudlib.lxd.instance.Instance.ip."""
@@ -107,9 +138,9 @@ class TestIP:
                 ["unparseable"],
                 "",
                 0,
-                150,
+                TIMEOUT_SLEEPS,
                 TimeoutError(
-                    "Unable to determine IP address after 150 retries."
+                    "Unable to determine IP address after 150 seconds."
                     " exit:0 stdout: unparseable stderr: "
                 ),
             ),
@@ -117,9 +148,9 @@ class TestIP:
                 ["10.0.0.1 (eth0)"],
                 "",
                 1,
-                150,
+                TIMEOUT_SLEEPS,
                 TimeoutError(
-                    "Unable to determine IP address after 150 retries."
+                    "Unable to determine IP address after 150 seconds."
                     " exit:1 stdout: 10.0.0.1 (eth0) stderr: "
                 ),
             ),
@@ -127,30 +158,47 @@ class TestIP:
                 [""],
                 "",
                 0,
-                150,
+                TIMEOUT_SLEEPS,
                 TimeoutError(
-                    "Unable to determine IP address after 150 retries."
+                    "Unable to determine IP address after 150 seconds."
                     " exit:0 stdout:  stderr: "
                 ),
             ),
             (  # only retry until success
-                ["unparseable", "10.69.10.5 (eth0)\n"],
+                ["unparseable", "unparseable", "10.69.10.5 (eth0)\n"],
                 "",
                 0,
-                1,
+                [0.5, 1],
                 "10.69.10.5",
             ),
-            (["10.69.10.5 (eth0)\n"], "", 0, 0, "10.69.10.5"),
+            (["10.69.10.5 (eth0)\n"], "", 0, [], "10.69.10.5"),
+        ),
+        ids=(
+            "unparseable",
+            "non-zero-exit",
+            "empty",
+            "retry-until-success",
+            "success",
         ),
     )
-    @mock.patch("pycloudlib.lxd.instance.time.sleep")
-    @mock.patch("pycloudlib.lxd.instance.subp")
+    @pytest.mark.usefixtures("m_get_client")
+    @mock.patch("pycloudlib.lxd.instance.random.uniform", return_value=0)
     def test_ip_parses_ipv4_output_from_lxc(
-        self, m_subp, m_sleep, stdouts, stderr, return_code, sleeps, expected
+        self,
+        _m_uniform,
+        m_subp,
+        m_time,
+        lxd_instance,
+        stdouts,
+        stderr,
+        return_code,
+        sleeps,
+        expected,
     ):
         """IPv4 output matches specific vm name from `lxc list`.
 
-        Errors are retried and result in TimeoutError on failure.
+        Errors are retried with exponential backoff and result in
+        TimeoutError once the time budget is spent.
         """
         if len(stdouts) > 1:
             m_subp.side_effect = [
@@ -161,32 +209,196 @@ class TestIP:
             m_subp.return_value = Result(
                 stdout=stdouts[0], stderr=stderr, return_code=return_code
             )
-        instance = LXDInstance(name="my_vm")
         lxc_mock = mock.call(
-            ["lxc", "list", "^my_vm$", "-c4", "--format", "csv"]
+            ["lxc", "list", "^test$", "-c4", "--format", "csv"],
+            close_fds=False,
         )
         if isinstance(expected, Exception):
             with pytest.raises(type(expected), match=re.escape(str(expected))):
-                instance.ip  # pylint: disable=pointless-statement
-            assert [lxc_mock] * sleeps == m_subp.call_args_list
+                lxd_instance.ip  # pylint: disable=pointless-statement
         else:
-            assert expected == instance.ip
-            assert [lxc_mock] * (1 + sleeps) == m_subp.call_args_list
-        assert sleeps == m_sleep.call_count
+            assert expected == lxd_instance.ip
+        assert [lxc_mock] * (1 + len(sleeps)) == m_subp.call_args_list
+        assert sleeps == pytest.approx(
+            [call[0][0] for call in m_time.sleep.call_args_list]
+        )
+
+    @pytest.mark.usefixtures("m_get_client")
+    def test_ip_backoff_adds_bounded_jitter(
+        self, m_subp, m_time, lxd_instance
+    ):
+        """Each delay is the backoff step plus up to BACKOFF_JITTER."""
+        m_subp.side_effect = [
+            Result(stdout="", stderr="", return_code=1),
+            Result(stdout="", stderr="", return_code=1),
+            Result(stdout="10.69.10.5 (eth0)\n", stderr="", return_code=0),
+        ]
+        assert "10.69.10.5" == lxd_instance.ip
+        delays = [call[0][0] for call in m_time.sleep.call_args_list]
+        assert 2 == len(delays)
+        for delay, step in zip(delays, (0.5, 1)):
+            assert step <= delay <= step + 0.1
+
+    def test_ip_reads_instance_state_from_api(
+        self, m_get_client, m_subp, m_time, lxd_instance
+    ):
+        """A global IPv4 address from the LXD API is used without lxc."""
+        m_client = m_get_client.return_value = mock.Mock()
+        no_ip = {"status": "Running", "network": {"lo": LO_STATE}}
+        m_client.get.side_effect = [
+            ["/1.0/instances/test", "/1.0/instances/other?project=dev"],
+            no_ip,
+            {
+                "status": "Running",
+                "network": {
+                    "lo": LO_STATE,
+                    "eth0": {
+                        "addresses": [
+                            {
+                                "family": "inet6",
+                                "address": "fe80::1",
+                                "scope": "link",
+                            },
+                            {
+                                "family": "inet",
+                                "address": "10.69.10.5",
+                                "scope": "global",
+                            },
+                        ]
+                    },
+                },
+            },
+        ]
+        assert "10.69.10.5" == lxd_instance.ip
+        assert [
+            mock.call("/1.0/instances?all-projects=true"),
+            mock.call("/1.0/instances/test/state?project=default"),
+            mock.call("/1.0/instances/test/state?project=default"),
+        ] == m_client.get.call_args_list
+        assert 1 == m_time.sleep.call_count
+        assert 0 == m_subp.call_count
+
+    @pytest.mark.parametrize(
+        "network,expected",
+        (
+            (
+                {
+                    "docker0": _nic_state("172.17.0.1"),
+                    "br-0123456789ab": _nic_state("172.18.0.1"),
+                    "eth0": _nic_state("10.69.10.5"),
+                },
+                "10.69.10.5",
+            ),
+            (
+                {
+                    "enp5s0": _nic_state("10.69.10.5"),
+                    "enp6s0": _nic_state("10.69.11.5"),
+                    "lxdbr0": _nic_state("10.0.3.1"),
+                },
+                "10.69.10.5",
+            ),
+            (
+                {
+                    "docker0": _nic_state("172.17.0.1"),
+                    "ens3": _nic_state("10.69.10.5"),
+                    "veth1234": _nic_state("169.254.0.1"),
+                },
+                "10.69.10.5",
+            ),
+        ),
+        ids=("container", "vm", "renamed-nic"),
+    )
+    @pytest.mark.usefixtures("m_time")
+    def test_ip_prefers_instance_nic_over_bridges(
+        self, m_get_client, m_subp, lxd_instance, network, expected
+    ):
+        """Bridges inside the instance, e.g. docker0, are not picked."""
+        m_client = m_get_client.return_value = mock.Mock()
+        m_client.get.side_effect = [
+            ["/1.0/instances/test"],
+            {"status": "Running", "network": {"lo": LO_STATE, **network}},
+        ]
+        assert expected == lxd_instance.ip
+        assert 0 == m_subp.call_count
+
+    @pytest.mark.usefixtures("m_time")
+    def test_ip_passes_instance_project_to_api(
+        self, m_get_client, m_subp, lxd_instance
+    ):
+        """The state of an instance in another project is read from it."""
+        m_client = m_get_client.return_value = mock.Mock()
+        m_client.get.side_effect = [
+            ["/1.0/instances/other", "/1.0/instances/test?project=dev%2F1"],
+            {"status": "Running", "network": {"eth0": _nic_state("10.0.0.2")}},
+        ]
+        assert "10.0.0.2" == lxd_instance.ip
+        assert (
+            mock.call("/1.0/instances/test/state?project=dev%2F1")
+            == m_client.get.call_args
+        )
+        assert 0 == m_subp.call_count
+
+    @pytest.mark.parametrize(
+        "name,urls",
+        (
+            (
+                "test",
+                [
+                    "/1.0/instances/test",
+                    "/1.0/instances/test?project=dev",
+                ],
+            ),
+            ("test", ["/1.0/instances/other"]),
+            ("remote:test", ["/1.0/instances/test"]),
+        ),
+        ids=("several-projects", "not-local", "remote"),
+    )
+    @pytest.mark.usefixtures("m_time")
+    def test_ip_falls_back_to_lxc_unless_instance_is_unambiguous(
+        self, m_get_client, m_subp, name, urls
+    ):
+        """Instance state is only read when the local match is unique."""
+        m_client = m_get_client.return_value = mock.Mock()
+        m_client.get.return_value = urls
+        m_subp.return_value = Result(
+            stdout="10.69.10.5 (eth0)\n", stderr="", return_code=0
+        )
+        assert "10.69.10.5" == LXDInstance(name=name).ip
+        assert all(
+            "/state" not in call[0][0] for call in m_client.get.call_args_list
+        )
+        assert 1 == m_subp.call_count
+
+    @pytest.mark.usefixtures("m_time")
+    def test_ip_falls_back_to_lxc_on_api_errors(
+        self, m_get_client, m_subp, lxd_instance
+    ):
+        """API errors, e.g. instance on another remote, fall back to lxc."""
+        m_client = m_get_client.return_value = mock.Mock()
+        m_client.get.side_effect = LXDAPIError("not found")
+        m_subp.return_value = Result(
+            stdout="10.69.10.5 (eth0)\n", stderr="", return_code=0
+        )
+        assert "10.69.10.5" == lxd_instance.ip
+        assert 1 == m_client.get.call_count
+        assert 1 == m_subp.call_count
 
 
 class TestWaitForStop:
     """Tests covering pycloudlib.lxd.instance.Instance.wait_for_stop."""
 
-    @pytest.mark.parametrize("is_ephemeral", ((True), (False)))
+    @pytest.mark.parametrize(
+        "is_ephemeral", (True, False), ids=("ephemeral", "persistent")
+    )
     def test_wait_for_stop_does_not_wait_for_ephemeral_instances(
-        self, is_ephemeral
+        self, lxd_instance, is_ephemeral
     ):
         """LXDInstance.wait_for_stop does not wait on ephemeral instances."""
-        instance = LXDInstance(name="test")
-        with mock.patch.object(instance, "wait_for_state") as wait_for_state:
-            with mock.patch.object(type(instance), "ephemeral", is_ephemeral):
-                instance.wait_for_stop()
+        with mock.patch.object(
+            lxd_instance, "wait_for_state"
+        ) as wait_for_state:
+            with mock.patch.object(LXDInstance, "ephemeral", is_ephemeral):
+                lxd_instance.wait_for_stop()
 
         call_count = 0 if is_ephemeral else 1
         assert call_count == wait_for_state.call_count
@@ -202,18 +414,17 @@ class TestShutdown:
             (False, False, ["lxc", "stop", "test"]),
             (True, True, ["lxc", "stop", "test", "--force"]),
         ),
+        ids=("wait", "no-wait", "wait-force"),
     )
-    @mock.patch("pycloudlib.lxd.instance.subp")
     def test_shutdown_calls_wait_for_stopped_state_when_wait_true(
-        self, m_subp, wait, force, cmd
+        self, m_subp, lxd_instance, wait, force, cmd
     ):
         """LXDInstance.wait_for_stopped called when wait is True."""
-        instance = LXDInstance(name="test")
-        with mock.patch.object(instance, "wait_for_stop") as wait_for_stop:
-            with mock.patch.object(type(instance), "state", "RUNNING"):
-                instance.shutdown(wait=wait, force=force)
+        with mock.patch.object(lxd_instance, "wait_for_stop") as wait_for_stop:
+            with mock.patch.object(LXDInstance, "state", "RUNNING"):
+                lxd_instance.shutdown(wait=wait, force=force)
 
-        assert [mock.call(cmd)] == m_subp.call_args_list
+        assert [mock.call(cmd, close_fds=False)] == m_subp.call_args_list
         call_count = 1 if wait else 0
         assert call_count == wait_for_stop.call_count
 
@@ -221,20 +432,19 @@ class TestShutdown:
 class TestDelete:
     """Tests covering pycloudlib.lxd.instance.Instance.delete."""
 
-    @pytest.mark.parametrize("is_ephemeral", ((True), (False)))
+    @pytest.mark.parametrize(
+        "is_ephemeral", (True, False), ids=("ephemeral", "persistent")
+    )
     @mock.patch("pycloudlib.lxd.instance.LXDInstance.shutdown")
-    @mock.patch("pycloudlib.lxd.instance.subp")
     def test_delete_on_ephemeral_instance_calls_shutdown(
-        self, m_subp, m_shutdown, is_ephemeral
+        self, m_shutdown, m_subp, lxd_instance, is_ephemeral
     ):
         """Check if ephemeral instance delete stops it instead of deleting it.
 
         Also verify is delete is actually called if instance is not ephemeral.
         """
-        instance = LXDInstance(name="test")
-
-        with mock.patch.object(type(instance), "ephemeral", is_ephemeral):
-            instance.delete(wait=False)
+        with mock.patch.object(LXDInstance, "ephemeral", is_ephemeral):
+            lxd_instance.delete(wait=False)
 
         if is_ephemeral:
             assert 1 == m_shutdown.call_count
@@ -243,5 +453,7 @@ class TestDelete:
             assert 0 == m_shutdown.call_count
             assert 1 == m_subp.call_count
             assert [
-                mock.call(["lxc", "delete", "test", "--force"])
+                mock.call(
+                    ["lxc", "delete", "test", "--force"], close_fds=False
+                )
             ] == m_subp.call_args_list
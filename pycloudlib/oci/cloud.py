@@ -3,18 +3,31 @@
 """OCI Cloud type."""
 
 import base64
-import json
-import os
 import re
 
-import oci
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from pycloudlib.cloud import BaseCloud
 from pycloudlib.config import ConfigFile
 from pycloudlib.oci.instance import OciInstance
-from pycloudlib.oci.utils import get_subnet_id, wait_till_ready
+from pycloudlib.oci.utils import (
+    backoff_poll_interval,
+    get_oci_client,
+    get_subnet_id,
+    load_oci_config,
+    wait_till_ready,
+)
 from pycloudlib.util import UBUNTU_RELEASE_VERSION_MAP, subp
 
+# Ubuntu version numbers: 18.04, 20.04, etc
+_UBUNTU_VERSION_RE = re.compile(r"\d{2}\.\d{2}")
+
+# Images whose display name contains any of these are not general purpose
+_DAILY_SKIP_RE = re.compile(r"aarch64|GPU")
+
 
 class OCI(BaseCloud):
     """OCI (Oracle) cloud class."""
@@ -51,6 +64,8 @@ class OCI(BaseCloud):
             config_dict: A dictionary containing the OCI config.
                 Overrides the values from config_path
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         super().__init__(
             tag,
             timestamp_suffix,
@@ -65,20 +80,22 @@ class OCI(BaseCloud):
         compartment_id = compartment_id or self.config.get("compartment_id")
         if not compartment_id:
             command = ["oci", "iam", "compartment", "get"]
-            exception_text = (
-                "Could not obtain OCI compartment id. Has the CLI client been "
-                "setup?\nCommand attempted: '{}'".format(" ".join(command))
-            )
+            result = cause = None
             try:
                 result = subp(command, rcs=())
             except FileNotFoundError as e:
-                raise Exception(exception_text) from e
-            if not result.ok:
-                exception_text += "\nstdout: {}\nstderr: {}".format(
-                    result.stdout, result.stderr
+                cause = e
+            if result is None or not result.ok:
+                exception_text = (
+                    "Could not obtain OCI compartment id. Has the CLI client "
+                    f"been setup?\nCommand attempted: '{' '.join(command)}'"
                 )
-                raise Exception(exception_text)
-            compartment_id = json.loads(result.stdout)["data"]["id"]
+                if result is not None:
+                    exception_text += (
+                        f"\nstdout: {result.stdout}\nstderr: {result.stderr}"
+                    )
+                raise Exception(exception_text) from cause
+            compartment_id = json_loads(result.stdout)["data"]["id"]
         self.compartment_id = compartment_id
 
         if config_dict:
@@ -87,8 +104,7 @@ class OCI(BaseCloud):
                 self.oci_config = config_dict
             except oci.exceptions.InvalidConfig as e:
                 raise ValueError(
-                    "Config dict is invalid. Pass a valid config dict. "
-                    "{}".format(e)
+                    f"Config dict is invalid. Pass a valid config dict. {e}"
                 ) from e
 
         else:
@@ -97,16 +113,15 @@ class OCI(BaseCloud):
                 or self.config.get("config_path")
                 or "~/.oci/config"
             )
-            if not os.path.isfile(os.path.expanduser(config_path)):
-                raise ValueError(
-                    "{} is not a valid config file. Pass a valid config "
-                    "file.".format(config_path)
-                )
-            self.oci_config = oci.config.from_file(config_path)
+            self.oci_config = load_oci_config(config_path)
 
         self._log.debug("Logging into OCI")
-        self.compute_client = oci.core.ComputeClient(self.oci_config)
-        self.network_client = oci.core.VirtualNetworkClient(self.oci_config)
+        self.compute_client = get_oci_client(
+            oci.core.ComputeClient, self.oci_config
+        )
+        self.network_client = get_oci_client(
+            oci.core.VirtualNetworkClient, self.oci_config
+        )
 
     def delete_image(self, image_id):
         """Delete an image.
@@ -150,14 +165,14 @@ class OCI(BaseCloud):
 
         Returns:
             string, id of latest image
+        Raises: ValueError if no matching image is found
 
         """
         if operating_system == "Canonical Ubuntu":
-            if not re.match(r"^\d{2}\.\d{2}$", release):  # 18.04, 20.04, etc
-                try:
-                    release = UBUNTU_RELEASE_VERSION_MAP[release]
-                except KeyError as e:
-                    raise ValueError("Invalid release") from e
+            if not _UBUNTU_VERSION_RE.fullmatch(release):
+                release = UBUNTU_RELEASE_VERSION_MAP.get(release)
+                if release is None:
+                    raise ValueError("Invalid release")
 
         # OCI likes to keep a few of each image around, so sort by
         # timestamp descending and grab the first (most recent) one
@@ -168,12 +183,19 @@ class OCI(BaseCloud):
             sort_by="TIMECREATED",
             sort_order="DESC",
         )
-        matching_image = [
-            i
-            for i in image_response.data
-            if "aarch64" not in i.display_name and "GPU" not in i.display_name
-        ]
-        image_id = matching_image[0].id
+        image_id = next(
+            (
+                i.id
+                for i in image_response.data
+                if not _DAILY_SKIP_RE.search(i.display_name)
+            ),
+            None,
+        )
+        if image_id is None:
+            raise ValueError(
+                f"No {operating_system} {release} image found in compartment"
+                f" {self.compartment_id}"
+            )
         return image_id
 
     def image_serial(self, image_id):
@@ -188,21 +210,26 @@ class OCI(BaseCloud):
         """
         raise NotImplementedError
 
-    def get_instance(self, instance_id):
+    def get_instance(self, instance_id, *, validate=True):
         """Get an instance by id.
 
         Args:
             instance_id:
+            validate: Check with OCI that instance_id exists. Callers which
+                already retrieved the instance, e.g. launch, pass False.
         Returns:
             An instance object to use to manipulate the instance further.
         """
-        try:
-            self.compute_client.get_instance(instance_id)
-        except oci.exceptions.ServiceError as e:
-            raise Exception(
-                "Unable to retrieve instance with id: {} . "
-                "Is it a valid instance id?".format(instance_id)
-            ) from e
+        if validate:
+            import oci  # pylint: disable=import-outside-toplevel
+
+            try:
+                self.compute_client.get_instance(instance_id)
+            except oci.exceptions.ServiceError as e:
+                raise Exception(
+                    f"Unable to retrieve instance with id: {instance_id} . "
+                    "Is it a valid instance id?"
+                ) from e
 
         return OciInstance(
             key_pair=self.key_pair,
@@ -226,7 +253,8 @@ class OCI(BaseCloud):
             instance_type: string, type of instance to create.
                 https://docs.cloud.oracle.com/en-us/iaas/Content/Compute/References/computeshapes.htm
             user_data: used by Cloud-Init to run custom scripts or
-                provide custom Cloud-Init configuration
+                provide custom Cloud-Init configuration. Either str or
+                already encoded bytes
             wait: wait for instance to be live
             **kwargs: dictionary of other arguments to pass as
                 LaunchInstanceDetails
@@ -235,6 +263,8 @@ class OCI(BaseCloud):
             An instance object to use to manipulate the instance further.
         Raises: ValueError on invalid image_id
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         if not image_id:
             raise ValueError(
                 f"{self._type} launch requires image_id param."
@@ -247,9 +277,9 @@ class OCI(BaseCloud):
             "ssh_authorized_keys": self.key_pair.public_key_content,
         }
         if user_data:
-            metadata["user_data"] = base64.b64encode(
-                user_data.encode("utf8")
-            ).decode("ascii")
+            if isinstance(user_data, str):
+                user_data = user_data.encode("utf8")
+            metadata["user_data"] = base64.b64encode(user_data).decode("ascii")
 
         instance_details = oci.core.models.LaunchInstanceDetails(
             display_name=self.tag,
@@ -265,13 +295,8 @@ class OCI(BaseCloud):
         instance_data = self.compute_client.launch_instance(
             instance_details
         ).data
-        instance = self.get_instance(instance_data.id)
+        instance = self.get_instance(instance_data.id, validate=False)
         if wait:
-            wait_till_ready(
-                func=self.compute_client.get_instance,
-                current_data=instance_data,
-                desired_state="RUNNING",
-            )
             instance.wait()
         return instance
 
@@ -285,6 +310,8 @@ class OCI(BaseCloud):
         Returns:
             An image object
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         if clean:
             instance.clean()
         image_details = {
@@ -300,6 +327,7 @@ class OCI(BaseCloud):
             func=self.compute_client.get_image,
             current_data=image_data,
             desired_state="AVAILABLE",
+            poll_interval_fn=backoff_poll_interval,
         )
 
         return image_data.id
@@ -2,10 +2,14 @@
 # This file is part of pycloudlib. See LICENSE file for license information.
 """OCI instance."""
 
-import oci
-
 from pycloudlib.instance import BaseInstance
-from pycloudlib.oci.utils import get_subnet_id, wait_till_ready
+from pycloudlib.oci.utils import (
+    backoff_poll_interval,
+    get_oci_client,
+    get_subnet_id,
+    load_oci_config,
+    wait_till_ready,
+)
 
 
 class OciInstance(BaseInstance):
@@ -24,15 +28,21 @@ class OciInstance(BaseInstance):
             oci_config: OCI configuration dictionary
 
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         super().__init__(key_pair)
         self.instance_id = instance_id
         self.compartment_id = compartment_id
         self._ip = None
 
         if oci_config is None:
-            oci_config = oci.config.from_file("~/.oci/config")
-        self.compute_client = oci.core.ComputeClient(oci_config)
-        self.network_client = oci.core.VirtualNetworkClient(oci_config)
+            oci_config = load_oci_config("~/.oci/config")
+        self.compute_client = get_oci_client(
+            oci.core.ComputeClient, oci_config
+        )
+        self.network_client = get_oci_client(
+            oci.core.VirtualNetworkClient, oci_config
+        )
 
     def __repr__(self):
         """Create string representation of class."""
@@ -114,6 +124,7 @@ class OciInstance(BaseInstance):
             func=self.compute_client.get_instance,
             current_data=self.instance_data,
             desired_state="RUNNING",
+            poll_interval_fn=backoff_poll_interval,
         )
 
     def wait_for_delete(self):
@@ -142,6 +153,8 @@ class OciInstance(BaseInstance):
         Note: It assumes the associated compartment has at least one subnet and
         creates the vnic in the first encountered subnet.
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         subnet_id = get_subnet_id(
             self.network_client, self.compartment_id, self.availability_domain
         )
@@ -172,6 +185,8 @@ class OciInstance(BaseInstance):
 
         Note: In OCI, detaching triggers deletion.
         """
+        import oci  # pylint: disable=import-outside-toplevel
+
         vnic_attachments = oci.pagination.list_call_get_all_results_generator(
             self.compute_client.list_vnic_attachments,
             "record",
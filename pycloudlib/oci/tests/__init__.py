@@ -0,0 +1 @@
+"""Tests related to pycloudlib.oci module."""
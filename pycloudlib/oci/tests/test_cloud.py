@@ -0,0 +1,75 @@
+"""Tests related to pycloudlib.oci.cloud module."""
+from unittest import mock
+
+import oci
+import pytest
+
+from pycloudlib.oci.cloud import OCI
+
+# mock module path
+MPATH = "pycloudlib.oci.cloud."
+
+
+class FakeOCI(OCI):
+    """OCI Class that doesn't load config or make requests during __init__."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, *_, **__):
+        """Fake __init__ that sets mocks for needed variables."""
+        self._log = mock.MagicMock()
+        self.key_pair = mock.Mock()
+        self.compartment_id = "ocid1.compartment.oc1..a"
+        self.oci_config = {"region": "us-phoenix-1"}
+        self.compute_client = mock.Mock()
+        self.network_client = mock.Mock()
+        self.availability_domain = "Uocm:PHX-AD-1"
+        self.tag = "test-tag"
+
+
+@mock.patch(MPATH + "OciInstance")
+class TestGetInstance:
+    """Tests covering OCI.get_instance."""
+
+    def test_instance_id_is_validated(self, m_instance):
+        """By default the instance is looked up before being returned."""
+        oci_cloud = FakeOCI()
+        assert m_instance.return_value == oci_cloud.get_instance("ocid1.i")
+        oci_cloud.compute_client.get_instance.assert_called_once_with(
+            "ocid1.i"
+        )
+        m_instance.assert_called_once_with(
+            key_pair=oci_cloud.key_pair,
+            instance_id="ocid1.i",
+            compartment_id=oci_cloud.compartment_id,
+            oci_config=oci_cloud.oci_config,
+        )
+
+    def test_invalid_instance_id(self, m_instance):
+        """Unknown instance ids raise."""
+        oci_cloud = FakeOCI()
+        oci_cloud.compute_client.get_instance.side_effect = (
+            oci.exceptions.ServiceError(404, "NotFound", {}, "not found")
+        )
+        with pytest.raises(Exception, match="Unable to retrieve instance"):
+            oci_cloud.get_instance("ocid1.i")
+        assert not m_instance.called
+
+    def test_validation_can_be_skipped(self, m_instance):
+        """validate=False returns the instance without a lookup."""
+        oci_cloud = FakeOCI()
+        assert m_instance.return_value == oci_cloud.get_instance(
+            "ocid1.i", validate=False
+        )
+        assert not oci_cloud.compute_client.get_instance.called
+
+    def test_launch_does_not_look_up_launched_instance(self, m_instance):
+        """Launched instances are returned without a lookup."""
+        oci_cloud = FakeOCI()
+        oci_cloud.compute_client.launch_instance.return_value.data.id = (
+            "ocid1.i"
+        )
+        with mock.patch(MPATH + "get_subnet_id", return_value="subnet"):
+            instance = oci_cloud.launch("ocid1.image", wait=False)
+        assert m_instance.return_value == instance
+        assert not oci_cloud.compute_client.get_instance.called
+        assert not m_instance.return_value.wait.called
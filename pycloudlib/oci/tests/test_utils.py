@@ -0,0 +1,106 @@
+"""Tests related to pycloudlib.oci.utils module."""
+import os
+import pathlib
+import threading
+from unittest import mock
+
+import pytest
+
+from pycloudlib.oci.utils import (
+    clear_client_cache,
+    get_oci_client,
+    load_oci_config,
+)
+
+MPATH = "pycloudlib.oci.utils."
+
+CONFIG = {
+    "tenancy": "ocid1.tenancy.oc1..a",
+    "user": "ocid1.user.oc1..a",
+    "region": "us-phoenix-1",
+    "fingerprint": "aa:bb",
+    "key_file": "/key.pem",
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Don't share OCI clients between tests."""
+    clear_client_cache()
+    yield
+    clear_client_cache()
+
+
+class TestGetOciClient:
+    """Tests covering get_oci_client."""
+
+    def test_client_is_shared_within_a_thread(self):
+        """The same config gets the same client in one thread."""
+        m_client_class = mock.Mock()
+        client = get_oci_client(m_client_class, CONFIG)
+        assert client is get_oci_client(m_client_class, dict(CONFIG))
+        m_client_class.assert_called_once_with(CONFIG)
+
+    def test_config_identity_changes_get_a_new_client(self):
+        """A different region gets a different client."""
+        m_client_class = mock.Mock(side_effect=lambda _: mock.Mock())
+        client = get_oci_client(m_client_class, CONFIG)
+        other_config = dict(CONFIG, region="us-ashburn-1")
+        assert client is not get_oci_client(m_client_class, other_config)
+
+    def test_threads_get_their_own_clients(self):
+        """Clients are not shared across threads."""
+        m_client_class = mock.Mock(side_effect=lambda _: mock.Mock())
+        client = get_oci_client(m_client_class, CONFIG)
+        thread_clients = []
+        thread = threading.Thread(
+            target=lambda: thread_clients.append(
+                get_oci_client(m_client_class, CONFIG)
+            )
+        )
+        thread.start()
+        thread.join()
+        assert client is not thread_clients[0]
+
+    def test_clear_client_cache(self):
+        """Clearing the cache builds new clients."""
+        m_client_class = mock.Mock(side_effect=lambda _: mock.Mock())
+        client = get_oci_client(m_client_class, CONFIG)
+        clear_client_cache()
+        assert client is not get_oci_client(m_client_class, CONFIG)
+        assert 2 == m_client_class.call_count
+
+
+@mock.patch(MPATH + "_read_oci_config", return_value=CONFIG)
+class TestLoadOciConfig:
+    """Tests covering load_oci_config."""
+
+    def test_accepts_path_objects(self, m_read, tmp_path):
+        """A pathlib.Path is read like its string form."""
+        config_path = tmp_path / "config"
+        config_path.write_text("[DEFAULT]\n")
+
+        config = load_oci_config(config_path)
+        assert CONFIG == config
+        assert config is not CONFIG
+        m_read.assert_called_once_with(
+            str(config_path), config_path.stat().st_mtime_ns
+        )
+
+    def test_expands_home(self, m_read, tmp_path):
+        """A path starting with ~ is read from the home directory."""
+        (tmp_path / "config").write_text("[DEFAULT]\n")
+
+        with mock.patch.dict(os.environ, {"HOME": str(tmp_path)}):
+            load_oci_config(pathlib.Path("~/config"))
+            load_oci_config("~/config")
+        assert [str(tmp_path / "config")] * 2 == [
+            call[0][0] for call in m_read.call_args_list
+        ]
+
+    @pytest.mark.parametrize("name", ("missing", "."), ids=("missing", "dir"))
+    def test_invalid_path(self, m_read, tmp_path, name):
+        """Paths that are not regular files raise ValueError."""
+        with pytest.raises(ValueError, match="is not a valid config file"):
+            load_oci_config(tmp_path / name)
+        assert not m_read.called
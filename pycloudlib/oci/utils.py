@@ -1,13 +1,98 @@
 # This file is part of pycloudlib. See LICENSE file for license information.
 """Utilities for OCI images and instances."""
+import functools
+import os
+import stat
+import threading
 import time
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     import oci
 
+# SDK clients shared between clouds and instances using the same identity.
+# OCI clients must not be shared between threads, so each thread has its own.
+_CLIENT_CACHE = threading.local()
 
-def wait_till_ready(func, current_data, desired_state, sleep_seconds=1000):
+
+@functools.lru_cache(maxsize=8)
+def _read_oci_config(config_path, _mtime_ns):
+    """Parse an OCI config file; _mtime_ns only busts the cache."""
+    import oci  # pylint: disable=import-outside-toplevel
+
+    return oci.config.from_file(config_path)
+
+
+def load_oci_config(config_path: str) -> dict:
+    """Load an OCI config file, reusing the parsed result when unchanged.
+
+    Args:
+        config_path: Path of OCI config file, as a string or path-like
+    Returns:
+        A copy of the OCI configuration dictionary
+    Raises:
+        ValueError if config_path is not a file
+    """
+    path = os.path.expanduser(os.fspath(config_path))
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise ValueError(
+            f"{config_path} is not a valid config file. Pass a valid config "
+            "file."
+        )
+    return dict(_read_oci_config(path, st.st_mtime_ns))
+
+
+def get_oci_client(client_class, oci_config: dict):
+    """Return a shared `client_class` instance for `oci_config`.
+
+    Clients are keyed on the identity and region in the config, so
+    repeated OCI() and OciInstance() constructions in the same thread
+    reuse the same connection pools instead of setting up new ones.
+    Other threads get their own clients.
+
+    Args:
+        client_class: OCI SDK client class, e.g. oci.core.ComputeClient
+        oci_config: OCI configuration dictionary
+    Returns:
+        An instance of client_class
+    """
+    key = (client_class,) + tuple(
+        oci_config.get(field)
+        for field in ("tenancy", "user", "region", "fingerprint", "key_file")
+    )
+    clients = getattr(_CLIENT_CACHE, "clients", None)
+    if clients is None:
+        clients = _CLIENT_CACHE.clients = {}
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = client_class(oci_config)
+    return client
+
+
+def clear_client_cache():
+    """Drop the OCI clients shared in the calling thread."""
+    _CLIENT_CACHE.clients = {}
+
+
+def backoff_poll_interval(attempt: int) -> float:
+    """Return seconds to sleep before poll `attempt` of a long wait.
+
+    Starts at 2 seconds and grows by 1.5x up to a 30 second cap.
+    """
+    return min(30, 2 * 1.5**attempt)
+
+
+def wait_till_ready(
+    func,
+    current_data,
+    desired_state,
+    sleep_seconds=1000,
+    poll_interval_fn=None,
+):
     """Wait until the results of function call reach a desired lifecycle state.
 
     Args:
@@ -15,14 +100,24 @@ def wait_till_ready(func, current_data, desired_state, sleep_seconds=1000):
         current_data: Structure containing the initial id and lifecycle state
         desired_state: Desired value of "lifecycle_state"
         sleep_seconds: How long to wait in seconds
+        poll_interval_fn: Optional callable taking the 0-based attempt
+            number and returning the seconds to sleep before the next
+            poll. Defaults to polling every second.
     Returns:
         The updated version of the current_data
     """
-    for _ in range(sleep_seconds):
+    deadline = time.monotonic() + sleep_seconds
+    attempt = 0
+    while True:
         current_data = func(current_data.id).data
         if current_data.lifecycle_state == desired_state:
             return current_data
-        time.sleep(1)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        delay = poll_interval_fn(attempt) if poll_interval_fn else 1
+        time.sleep(min(delay, remaining))
+        attempt += 1
     raise Exception(
         "Expected {} state, but found {} after waiting {} seconds. "
         "Check OCI console for more details".format(
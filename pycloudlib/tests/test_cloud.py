@@ -139,3 +139,33 @@ class TestBaseCloud:
         assert mycloud.key_pair.name == "some_name"
         assert mycloud.key_pair.public_key_path == "/home/asdf/.ssh/id_rsa.pub"
         assert mycloud.key_pair.private_key_path == "/home/asdf/.ssh/id_rsa"
+
+    @pytest.mark.parametrize(
+        "algorithm,expected_prefix",
+        (
+            (None, "ssh-ed25519 "),
+            ("ed25519", "ssh-ed25519 "),
+            ("rsa", "ssh-rsa "),
+        ),
+    )
+    def test_create_key_pair(self, algorithm, expected_prefix):
+        """Ed25519 keys are created unless RSA is explicitly requested."""
+        mycloud = CloudSubclass(tag="tag", config_file=StringIO(CONFIG))
+        if algorithm:
+            pub_key, priv_key = mycloud.create_key_pair(algorithm=algorithm)
+        else:
+            pub_key, priv_key = mycloud.create_key_pair()
+        assert pub_key.startswith(expected_prefix)
+        assert "PRIVATE KEY-----" in priv_key
+
+    def test_create_key_pair_invalid_algorithm(self):
+        """Unknown key algorithms are rejected."""
+        mycloud = CloudSubclass(tag="tag", config_file=StringIO(CONFIG))
+        with pytest.raises(ValueError, match="Unsupported key algorithm"):
+            mycloud.create_key_pair(algorithm="dsa")
+
+    def test_create_key_pair_algorithm_is_keyword_only(self):
+        """Algorithm can't be confused with the key name taken by Azure."""
+        mycloud = CloudSubclass(tag="tag", config_file=StringIO(CONFIG))
+        with pytest.raises(TypeError):
+            mycloud.create_key_pair("rsa")  # pylint: disable=E1121
@@ -5,7 +5,15 @@ from io import StringIO
 import mock
 import pytest
 
-from pycloudlib.config import parse_config
+from pycloudlib.config import clear_config_cache, parse_config
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Don't let cached configs leak between tests."""
+    clear_config_cache()
+    yield
+    clear_config_cache()
 
 
 def test_get_item_override():
@@ -51,3 +59,36 @@ class TestParseConfig:
         ]
         for expected, actual in zip(expected_order, m_load.call_args_list):
             assert expected in str(actual)
+
+
+class TestConfigCache:
+    """Test caching of parsed configuration files."""
+
+    def test_stream_parsed_once_per_content(self):
+        """Streams with identical content are only parsed once."""
+        with mock.patch("toml.load", return_value={}) as m_load:
+            parse_config(StringIO("[ec2]"))
+            parse_config(StringIO("[ec2]"))
+            assert 1 == m_load.call_count
+            parse_config(StringIO("[oci]"))
+            assert 2 == m_load.call_count
+
+    def test_file_reparsed_when_modified(self, tmp_path):
+        """Files are reparsed once their mtime changes."""
+        config_path = tmp_path / "pycloudlib.toml"
+        config_path.write_text('[ec2]\nregion = "us-east-1"\n')
+        assert "us-east-1" == parse_config(config_path)["ec2"]["region"]
+
+        with mock.patch("toml.load") as m_load:
+            config = parse_config(config_path)
+        assert 0 == m_load.call_count
+        assert "us-east-1" == config["ec2"]["region"]
+
+        config_path.write_text('[ec2]\nregion = "us-west-2"\n')
+        os.utime(config_path, ns=(0, 0))
+        assert "us-west-2" == parse_config(config_path)["ec2"]["region"]
+
+    def test_cached_config_is_not_shared(self):
+        """Mutating a returned config does not alter the cached copy."""
+        parse_config(StringIO("[ec2]"))["ec2"]["region"] = "changed"
+        assert {} == parse_config(StringIO("[ec2]"))["ec2"]
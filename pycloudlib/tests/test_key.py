@@ -0,0 +1,27 @@
+"""Tests related to pycloudlib.key module."""
+from pycloudlib.key import KeyPair
+
+
+class TestPublicKeyContent:
+    """Tests covering KeyPair.public_key_content."""
+
+    def test_public_key_read_once(self, tmp_path):
+        """The public key file is only read on first access."""
+        pub_key = tmp_path / "id_rsa.pub"
+        pub_key.write_text("ssh-rsa first")
+        key_pair = KeyPair(str(pub_key))
+        assert "ssh-rsa first" == key_pair.public_key_content
+
+        pub_key.write_text("ssh-rsa second")
+        assert "ssh-rsa first" == key_pair.public_key_content
+
+    def test_invalidate_rereads_public_key(self, tmp_path):
+        """After invalidate the public key file is read again."""
+        pub_key = tmp_path / "id_rsa.pub"
+        pub_key.write_text("ssh-rsa first")
+        key_pair = KeyPair(str(pub_key))
+        assert "ssh-rsa first" == key_pair.public_key_content
+
+        pub_key.write_text("ssh-rsa second")
+        key_pair.invalidate()
+        assert "ssh-rsa second" == key_pair.public_key_content
@@ -0,0 +1,104 @@
+"""Tests related to pycloudlib.util module."""
+import os
+import shutil
+import stat
+import subprocess
+from unittest import mock
+
+import pytest
+
+from pycloudlib.util import _find_executable, subp
+
+# Disable this pylint check as fixture usage incorrectly triggers it:
+# pylint: disable=redefined-outer-name,protected-access
+
+
+@pytest.fixture
+def bin_dir(tmp_path):
+    """Return a directory holding an executable named "fake-cmd"."""
+    cmd = tmp_path / "fake-cmd"
+    cmd.write_text("#!/bin/sh\n")
+    cmd.chmod(cmd.stat().st_mode | stat.S_IXUSR)
+    return tmp_path
+
+
+class TestFindExecutable:
+    """Tests covering pycloudlib.util._find_executable."""
+
+    def test_bare_name_found_on_env_path(self, bin_dir):
+        """A bare command name is looked up on env's PATH."""
+        env = {"PATH": str(bin_dir)}
+        assert str(bin_dir / "fake-cmd") == _find_executable(
+            ["fake-cmd", "arg"], env
+        )
+
+    def test_bare_name_found_on_os_environ(self, bin_dir):
+        """Without env, the PATH of the current process is searched."""
+        with mock.patch.dict(os.environ, {"PATH": str(bin_dir)}):
+            assert str(bin_dir / "fake-cmd") == _find_executable(["fake-cmd"])
+
+    def test_env_without_path_searches_defpath(self, bin_dir):
+        """An env lacking PATH searches os.defpath, as Popen does.
+
+        The PATH of the current process must not be used in that case.
+        """
+        with mock.patch.dict(os.environ, {"PATH": str(bin_dir)}):
+            with mock.patch("os.defpath", "/nonexistent"):
+                assert _find_executable(["fake-cmd"], {}) is None
+            with mock.patch("os.defpath", str(bin_dir)):
+                assert str(bin_dir / "fake-cmd") == _find_executable(
+                    ["fake-cmd"], {}
+                )
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["./fake-cmd", "arg"],
+            ["/usr/bin/fake-cmd"],
+            [b"fake-cmd"],
+            [],
+        ],
+    )
+    def test_only_bare_names_are_looked_up(self, args, bin_dir):
+        """Paths, bytes and empty args are left to Popen."""
+        assert _find_executable(args, {"PATH": str(bin_dir)}) is None
+
+    def test_missing_command(self, tmp_path):
+        """A command not found on PATH is left for Popen to report."""
+        assert _find_executable(["fake-cmd"], {"PATH": str(tmp_path)}) is None
+
+
+class TestSubp:
+    """Tests covering pycloudlib.util.subp."""
+
+    @mock.patch("pycloudlib.util.subprocess.Popen")
+    def test_close_fds_default(self, m_popen):
+        """Inherited descriptors are closed unless the caller opts out.
+
+        The executable is only looked up when opting out, and argv is kept
+        as given.
+        """
+        m_popen.return_value.communicate.return_value = (b"", b"")
+        m_popen.return_value.returncode = 0
+        subp(["true"])
+        assert [b"true"] == m_popen.call_args[0][0]
+        assert m_popen.call_args[1]["close_fds"] is True
+        assert m_popen.call_args[1]["executable"] is None
+
+        subp(["true"], close_fds=False)
+        assert [b"true"] == m_popen.call_args[0][0]
+        assert m_popen.call_args[1]["close_fds"] is False
+        assert shutil.which("true") == m_popen.call_args[1]["executable"]
+
+    @pytest.mark.skipif(
+        not getattr(subprocess, "_USE_POSIX_SPAWN", False),
+        reason="subprocess cannot use posix_spawn on this platform",
+    )
+    def test_close_fds_false_uses_posix_spawn(self):
+        """Opting out of close_fds lets the command be posix_spawn'ed."""
+        with mock.patch("os.posix_spawn", wraps=os.posix_spawn) as m_spawn:
+            assert subp(["echo", "hello"], close_fds=False).stdout == "hello"
+        assert 1 == m_spawn.call_count
+        executable, argv = m_spawn.call_args[0][:2]
+        assert shutil.which("echo") == os.fsdecode(executable)
+        assert [b"echo", b"hello"] == argv
@@ -8,6 +8,7 @@ import os
 import platform
 import re
 import shlex
+import shutil
 import subprocess
 import tempfile
 from errno import ENOENT
@@ -22,7 +23,8 @@ UBUNTU_RELEASE_VERSION_MAP = {
     "xenial": "16.04",
 }
 
-LTS_RELEASES = ["xenial", "bionic", "focal", "jammy"]
+LTS_RELEASES_ORDERED = ("xenial", "bionic", "focal", "jammy")
+LTS_RELEASES = frozenset(LTS_RELEASES_ORDERED)
 
 
 def chmod(path, mode):
@@ -149,7 +151,13 @@ def shell_safe(cmd):
 
 
 def subp(
-    args, data=None, env=None, shell=False, rcs=(0,), shortcircuit_stdin=True
+    args,
+    data=None,
+    env=None,
+    shell=False,
+    rcs=(0,),
+    shortcircuit_stdin=True,
+    close_fds=True,
 ):
     """Subprocess wrapper.
 
@@ -160,6 +168,9 @@ def subp(
         shell: optional shell to use
         rcs: tuple of successful exit codes, default: (0)
         shortcircuit_stdin: bind stdin to /dev/null if no data is given
+        close_fds: close inherited file descriptors in the child, default
+            True. Passing False lets CPython spawn via posix_spawn, but
+            any inheritable descriptor then leaks into the child.
 
     Returns:
         Tuple of out, err, return_code
@@ -179,6 +190,11 @@ def subp(
     else:
         stdin = None
 
+    executable = None
+    if not close_fds and not shell and not isinstance(args, (str, bytes)):
+        # posix_spawn is only used for executables given with a directory
+        args = list(args)
+        executable = _find_executable(args, env)
     bytes_args = _convert_args(args)
 
     try:
@@ -189,6 +205,8 @@ def subp(
             stdin=stdin,
             env=env,
             shell=shell,
+            close_fds=close_fds,
+            executable=executable,
         )
         (out, err) = process.communicate(data)
     finally:
@@ -258,6 +276,27 @@ def _get_local_ubuntu_arch():
     return local_ubuntu_arch
 
 
+def _find_executable(args, env=None):
+    """Return the full path of the executable of args, or None.
+
+    Only bare executable names are looked up, in the same directories
+    Popen would search, including os.defpath when env is given without
+    PATH.
+
+    Args:
+        args: list of arguments, the first being the executable
+        env: optional env the command will run with
+
+    Returns:
+        path of the executable, or None if it is not a bare name or was not
+        found
+    """
+    if args and isinstance(args[0], str) and os.sep not in args[0]:
+        path = os.pathsep.join(os.get_exec_path(env))
+        return shutil.which(args[0], path=path)
+    return None
+
+
 def _convert_args(args):
     """Convert subp arguments to bytes.
 